@@ -15,6 +15,7 @@
 from oslo.config import cfg
 
 from gceapi.api import addresses
+from gceapi.api import clients
 from gceapi.api import discovery
 from gceapi.api import disks
 from gceapi.api import firewalls
@@ -23,12 +24,14 @@ from gceapi.api import instances
 from gceapi.api import machine_types
 from gceapi.api import networks
 from gceapi.api import oauth
+from gceapi.api import operation_util
 from gceapi.api import operations
 from gceapi.api import projects
 from gceapi.api import regions
 from gceapi.api import routes
 from gceapi.api import snapshots
 from gceapi.api import zones
+from gceapi import db
 from gceapi.openstack.common import log as logging
 from gceapi import wsgi
 from gceapi import wsgi_ext as openstack_api
@@ -68,6 +71,13 @@ class APIRouter(wsgi.Router):
     def factory(cls, global_config, **local_config):
         """Simple paste factory, `gceapi.wsgi.Router` doesn't have one."""
 
+        # the API doesn't start with conflicting database options instead of
+        # failing every request
+        db.check_config()
+        # Discover novaclient extensions at startup instead of on the first
+        # request
+        clients.discover_nova_extensions()
+        operation_util.start_purger()
         return cls()
 
     def __init__(self):
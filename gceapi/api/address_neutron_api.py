@@ -16,6 +16,7 @@ from oslo.config import cfg
 
 from gceapi.api import base_api
 from gceapi.api import clients
+from gceapi.api import db_reconciler
 from gceapi.api import network_api
 from gceapi.api import operation_util
 from gceapi.api import region_api
@@ -117,4 +118,4 @@ class API(base_api.API):
             item["name"] = ("address-" +
                             item["floating_ip_address"].replace(".", "-"))
             item["creationTimestamp"] = ""
-            self._add_db_item(context, item)
+        db_reconciler.defer(context, self, new_items=items)
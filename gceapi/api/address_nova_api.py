@@ -14,6 +14,7 @@
 
 from gceapi.api import base_api
 from gceapi.api import clients
+from gceapi.api import db_reconciler
 from gceapi.api import operation_util
 from gceapi.api import region_api
 from gceapi.api import scopes
@@ -121,4 +122,4 @@ class API(base_api.API):
             item["name"] = ("address-" +
                             item["floating_ip_address"].replace(".", "-"))
             item["creationTimestamp"] = ""
-            self._add_db_item(context, item)
+        db_reconciler.defer(context, self, new_items=items)
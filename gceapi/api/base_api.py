@@ -18,8 +18,12 @@ Classes in this layer aggregate functionality of OpenStack necessary
 and sufficient to handle supported GCE API requests
 """
 
+import collections
+import copy
+
 from oslo.config import cfg
 
+from gceapi.api import db_reconciler
 from gceapi import db
 from gceapi import exception
 from gceapi.openstack.common import timeutils
@@ -109,6 +113,15 @@ class API(object):
 
         raise NotImplementedError
 
+    def _get_parent_attribute(self):
+        """Name of attribute which refers to parent item.
+
+        Its value is stored in indexed column of GCE API database, so items
+        of a parent are selected there. Can be overriden.
+        """
+
+        return None
+
     def get_item(self, context, name, scope=None):
         """Returns fully filled item for particular inherited API."""
 
@@ -119,6 +132,74 @@ class API(object):
 
         return []
 
+    def get_query_fields(self):
+        """Returns GCE fields which items can be filtered by in database.
+
+        The dict maps GCE field names to database columns. Kinds which
+        implement get_items_by_query should override it.
+        """
+
+        return {}
+
+    def get_items_by_query(self, context, scope, query):
+        """Returns page of items selected by query and marker of next page.
+
+        query is a dict with keys:
+        filters - dict of columns to values which items must have;
+        exclude - dict of columns to lists of values which items must not
+        have;
+        prefixes - list of (column, prefix, matches) to select items which
+        column starts with prefix or, if matches is False, doesn't;
+        sort_key - column to order items by or None for default order;
+        limit - page size or None for all items;
+        marker - list of sort key value and id of the last item of
+        the previous page or None for the first page.
+        Marker of next page is the same list for the last item of the page,
+        it's None if there are no more items.
+        """
+
+        raise NotImplementedError()
+
+    def get_aggregation_scopes(self, context):
+        """Returns scopes which aggregated list is collected by.
+
+        Items of every scope are got by get_items with the scope, scopes
+        are processed concurrently. Kinds which get items of a scope
+        without listing items of all scopes should override it, for others
+        None is returned and all items are got at once.
+        """
+
+        return None
+
+    def get_search_fields(self):
+        """Returns GCE fields which OpenStack can select items by.
+
+        The dict maps GCE field names to search options of search_items.
+        OpenStack may select more items than are equal to the value, items
+        are filtered after that anyway. Kinds which implement search_items
+        should override it.
+        """
+
+        return {}
+
+    def search_items(self, context, search_opts, scope):
+        """Returns items selected in OpenStack by search options."""
+
+        return self.get_items(context, scope)
+
+    def get_items_page(self, context, scope, limit, marker):
+        """Returns page of items and marker of next page.
+
+        Pages are requested from OpenStack, so items are ordered as
+        OpenStack lists them. marker is id of the last item of the previous
+        page or None for the first page. Marker of next page is None if
+        there are no more items.
+        Returns None if OpenStack can't page items of the kind, then the
+        whole list is got by get_items. Can be overriden.
+        """
+
+        return None
+
     def delete_item(self, context, name, scope=None):
         """Deletes an item."""
 
@@ -149,12 +230,40 @@ class API(object):
 
         self._callbacks.append((reason, func))
 
+    def _get_os_item(self, context, kind, item_id, load):
+        """Returns OpenStack object loaded once per request.
+
+        load(item_id) is called on the first lookup of (kind, item_id) in the
+        request, next lookups return the same object from the context.
+        Callers must not change the object.
+        """
+        identity_map = getattr(context, "identity_map", None)
+        if identity_map is None:
+            return load(item_id)
+        key = (kind, item_id)
+        if key not in identity_map:
+            identity_map[key] = load(item_id)
+        return identity_map[key]
+
+    def _set_os_items(self, context, kind, items):
+        """Puts OpenStack objects loaded in bulk to the request."""
+        identity_map = getattr(context, "identity_map", None)
+        if identity_map is not None:
+            for item in items:
+                identity_map[(kind, item.id)] = item
+
+    def _forget_os_item(self, context, kind, item_id):
+        """Drops OpenStack object changed by the request from the request."""
+        identity_map = getattr(context, "identity_map", None)
+        if identity_map is not None:
+            identity_map.pop((kind, item_id), None)
+
     def _prepare_item(self, item, db_item):
         if db_item is not None:
             item.update(db_item)
         return item
 
-    def _add_db_item(self, context, item):
+    def _make_db_item(self, item):
         db_item = dict((key, item.get(key))
                    for key in self._get_persistent_attributes()
                    if key in item)
@@ -165,31 +274,149 @@ class API(object):
             utcnow = timeutils.isotime(None, True)
             db_item["creationTimestamp"] = utcnow
             item["creationTimestamp"] = utcnow
-        db.add_item(context, self._get_type(), db_item)
+        return db_item
+
+    def _add_db_item(self, context, item):
+        db_item = self._make_db_item(item)
+        self._cache_db_items(context, [db_item])
+        db.add_item(context, self._get_type(), db_item,
+                    self._get_parent_attribute())
         return item
 
+    def _add_db_items(self, context, items):
+        """Adds items to database in one transaction."""
+        db_items = [self._make_db_item(item) for item in items]
+        self._cache_db_items(context, db_items)
+        db.add_items(context, self._get_type(), db_items,
+                     self._get_parent_attribute())
+        return items
+
     def _delete_db_item(self, context, item):
+        self._uncache_db_items(context, [item["id"]])
         return db.delete_item(context, self._get_type(), item["id"])
 
+    def _delete_db_items(self, context, items):
+        """Deletes items from database in one transaction."""
+        item_ids = [item["id"] for item in items]
+        self._uncache_db_items(context, item_ids)
+        db.delete_items(context, self._get_type(), item_ids)
+
     def _update_db_item(self, context, item):
         db_item = dict((key, item.get(key))
                    for key in self._get_persistent_attributes()
                    if key in item)
-        db.update_item(context, self._get_type(), db_item)
-
-    def _get_db_items(self, context):
-        return db.get_items(context, self._get_type())
+        self._cache_db_items(context, [db_item])
+        db.update_item(context, self._get_type(), db_item,
+                       self._get_parent_attribute())
+
+    def _update_db_items(self, context, items):
+        """Updates items in database in one transaction."""
+        db_items = [dict((key, item.get(key))
+                         for key in self._get_persistent_attributes()
+                         if key in item)
+                    for item in items]
+        self._cache_db_items(context, db_items)
+        db.update_items(context, self._get_type(), db_items,
+                        self._get_parent_attribute())
+
+    def _get_db_items(self, context, parent_name=None):
+        kind_cache = self._get_db_cache(context)
+        if kind_cache is None:
+            return db.get_items(context, self._get_type(), parent_name)
+        if not (kind_cache["complete"] or
+                parent_name is not None and
+                parent_name in kind_cache["parents"]):
+            items = db.get_items(context, self._get_type(), parent_name)
+            for item in items:
+                kind_cache["items"][item["id"]] = item
+            if parent_name is None:
+                kind_cache["complete"] = True
+            else:
+                kind_cache["parents"].add(parent_name)
+            return copy.deepcopy(items)
+        items = kind_cache["items"].values()
+        if parent_name is not None:
+            parent_attribute = self._get_parent_attribute()
+            items = [item for item in items
+                     if item.get(parent_attribute) == parent_name]
+        return copy.deepcopy(items)
 
     def _get_db_items_dict(self, context):
         return dict((item["id"], item) for item in self._get_db_items(context))
 
     def _get_db_item_by_id(self, context, item_id):
-        return db.get_item_by_id(context, self._get_type(), item_id)
+        kind_cache = self._get_db_cache(context)
+        if kind_cache is None:
+            return db.get_item_by_id(context, self._get_type(), item_id)
+        item = kind_cache["items"].get(item_id)
+        if item is None and not kind_cache["complete"]:
+            item = db.get_item_by_id(context, self._get_type(), item_id)
+            if item is not None:
+                kind_cache["items"][item_id] = item
+        return copy.deepcopy(item)
 
     def _get_db_item_by_name(self, context, name):
-        return db.get_item_by_name(context, self._get_type(), name)
+        kind_cache = self._get_db_cache(context)
+        if kind_cache is None:
+            return db.get_item_by_name(context, self._get_type(), name)
+        item = next((item for item in kind_cache["items"].itervalues()
+                     if item.get("name") == name), None)
+        if item is None and not kind_cache["complete"]:
+            item = db.get_item_by_name(context, self._get_type(), name)
+            if item is not None:
+                kind_cache["items"][item["id"]] = item
+        return copy.deepcopy(item)
+
+    def load_db_items(self, context):
+        """Loads all items of the kind from database to request cache.
+
+        Next lookups of items of the kind in the request don't go to database.
+        """
+        self._get_db_items(context)
+
+    def _get_db_cache(self, context):
+        """Returns items of the kind read or written in the request.
+
+        Returns None if context has no cache.
+        """
+        db_items = getattr(context, "db_items", None)
+        if db_items is None:
+            return None
+        kind_cache = db_items.get(self._get_type())
+        if kind_cache is None:
+            kind_cache = {
+                # all items of the kind are loaded
+                "complete": False,
+                # parent names which all items are loaded
+                "parents": set(),
+                "items": collections.OrderedDict(),
+            }
+            db_items[self._get_type()] = kind_cache
+        return kind_cache
+
+    def _cache_db_items(self, context, db_items):
+        kind_cache = self._get_db_cache(context)
+        if kind_cache is None:
+            return
+        for db_item in db_items:
+            item = copy.deepcopy(db_item)
+            if item.get("name") is None:
+                item.pop("name", None)
+            kind_cache["items"][item["id"]] = item
+
+    def _uncache_db_items(self, context, item_ids):
+        kind_cache = self._get_db_cache(context)
+        if kind_cache is None:
+            return
+        for item_id in item_ids:
+            kind_cache["items"].pop(item_id, None)
 
     def _purge_db(self, context, os_items, db_items_dict):
+        """Returns OpenStack items which have no database items.
+
+        Database items of vanished OpenStack items are deleted after the
+        request.
+        """
         only_os_items = []
         existed_db_items = set()
         for item in os_items:
@@ -198,9 +425,9 @@ class API(object):
                 only_os_items.append(item)
             else:
                 existed_db_items.add(db_item["id"])
-        for item in db_items_dict.itervalues():
-            if item["id"] not in existed_db_items:
-                self._delete_db_item(context, item)
+        obsolete_db_items = [item for item in db_items_dict.itervalues()
+                             if item["id"] not in existed_db_items]
+        db_reconciler.defer(context, self, obsolete_items=obsolete_db_items)
         return only_os_items
 
 
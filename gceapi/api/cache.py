@@ -0,0 +1,105 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process caches used by GCE API conversion layer."""
+
+import collections
+import threading
+import time
+
+
+class TTLCache(object):
+    """Bounded LRU cache with expiring entries.
+
+    When the cache holds max_size entries, adding a new one evicts the least
+    recently used entry. Each entry expires ttl seconds after it was set
+    (ttl can be overriden per entry); expired entries are never returned.
+    ttl of None means that entries don't expire.
+    Numbers of successful and failed lookups are counted in hits and misses.
+    """
+
+    def __init__(self, max_size, ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._items = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        self._lock.acquire()
+        try:
+            entry = self._items.pop(key, None)
+            if entry is None or self._is_expired(entry):
+                self.misses += 1
+                return default
+            self._items[key] = entry
+            self.hits += 1
+            return entry[0]
+        finally:
+            self._lock.release()
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self._ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._lock.acquire()
+        try:
+            self._items.pop(key, None)
+            self._items[key] = (value, expires_at)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+        finally:
+            self._lock.release()
+
+    def pop(self, key, default=None):
+        self._lock.acquire()
+        try:
+            entry = self._items.pop(key, None)
+            if entry is None or self._is_expired(entry):
+                return default
+            return entry[0]
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._items.clear()
+        finally:
+            self._lock.release()
+
+    def purge_expired(self):
+        """Removes expired entries, returns number of removed ones."""
+        self._lock.acquire()
+        try:
+            expired = [key for key, entry in self._items.iteritems()
+                       if self._is_expired(entry)]
+            for key in expired:
+                del self._items[key]
+            return len(expired)
+        finally:
+            self._lock.release()
+
+    def get_stats(self):
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._items)}
+
+    def __len__(self):
+        return len(self._items)
+
+    def _is_expired(self, entry):
+        expires_at = entry[1]
+        return expires_at is not None and expires_at <= time.time()
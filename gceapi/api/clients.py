@@ -13,17 +13,43 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+import time
+
 from keystoneclient.v2_0 import client as kc
 from novaclient import client as novaclient
 from novaclient import shell as novashell
 from oslo.config import cfg
 
+from gceapi.api import cache
 from gceapi.openstack.common.gettextutils import _
 from gceapi.openstack.common import log as logging
 
 logger = logging.getLogger(__name__)
 
+clients_opts = [
+    cfg.IntOpt('client_pool_size',
+               default=1000,
+               help='Maximum number of OpenStack clients kept in the pool'),
+    cfg.IntOpt('client_pool_ttl',
+               default=300,
+               help='Seconds an OpenStack client is reused before it is '
+                    'rebuilt'),
+    cfg.IntOpt('service_catalog_cache_size',
+               default=1000,
+               help='Maximum number of projects whose service endpoints '
+                    'are cached'),
+    cfg.IntOpt('service_catalog_cache_ttl',
+               default=600,
+               help='Seconds cached service endpoints of a project are '
+                    'valid'),
+    cfg.StrOpt('os_region_name',
+               default=None,
+               help='Region of OpenStack service endpoints to use'),
+]
+
 CONF = cfg.CONF
+CONF.register_opts(clients_opts)
 
 
 try:
@@ -44,59 +70,103 @@ except ImportError:
 
 
 def nova(context, service_type='compute'):
-    computeshell = novashell.OpenStackComputeShell()
-    extensions = computeshell._discover_extensions("1.1")
+    management_url = _url_for(context, service_type=service_type)
+    return _get_pooled_client(
+        context, service_type, management_url,
+        lambda: _create_nova(context, service_type, management_url))
 
+
+def _create_nova(context, service_type, management_url):
     args = {
         'project_id': context.project_id,
         'auth_url': CONF.keystone_gce_url,
         'service_type': service_type,
         'username': None,
         'api_key': None,
-        'extensions': extensions,
+        'extensions': discover_nova_extensions(),
     }
 
     client = novaclient.Client(1.1, **args)
 
-    management_url = _url_for(context, service_type=service_type)
     client.client.auth_token = context.auth_token
     client.client.management_url = management_url
 
     return client
 
 
+_nova_extensions = None
+_nova_extensions_lock = threading.Lock()
+
+
+def discover_nova_extensions():
+    """Returns novaclient extensions.
+
+    Extensions are discovered on first call only and then are shared by all
+    nova clients of the process.
+    """
+    global _nova_extensions
+    if _nova_extensions is not None:
+        return _nova_extensions
+
+    _nova_extensions_lock.acquire()
+    try:
+        if _nova_extensions is None:
+            start_time = time.time()
+            computeshell = novashell.OpenStackComputeShell()
+            extensions = computeshell._discover_extensions("1.1")
+            logger.info(_("Discovered %(count)d novaclient extensions "
+                          "in %(time).3f seconds"),
+                        {"count": len(extensions),
+                         "time": time.time() - start_time})
+            _nova_extensions = extensions
+        return _nova_extensions
+    finally:
+        _nova_extensions_lock.release()
+
+
 def neutron(context):
     if neutronclient is None:
         return None
 
+    endpoint_url = _url_for(context, service_type='network')
     args = {
         'auth_url': CONF.keystone_gce_url,
         'service_type': 'network',
         'token': context.auth_token,
-        'endpoint_url': _url_for(context, service_type='network'),
+        'endpoint_url': endpoint_url,
     }
 
-    return neutronclient.Client(**args)
+    return _get_pooled_client(context, 'network', endpoint_url,
+                              lambda: neutronclient.Client(**args))
 
 
 def glance(context):
     if glanceclient is None:
         return None
 
+    endpoint = _url_for(context, service_type='image')
     args = {
         'auth_url': CONF.keystone_gce_url,
         'service_type': 'image',
         'token': context.auth_token,
     }
 
-    return glanceclient.Client(
-        "1", endpoint=_url_for(context, service_type='image'), **args)
+    return _get_pooled_client(
+        context, 'image', endpoint,
+        lambda: glanceclient.Client("1", endpoint=endpoint, **args))
 
 
 def cinder(context):
     if cinderclient is None:
         return nova(context, 'volume')
 
+    management_url = _url_for(context, service_type='volume')
+    return _get_pooled_client(
+        context, 'volume', management_url,
+        lambda: _create_cinder(context, management_url))
+
+
+def _create_cinder(context, management_url):
     args = {
         'service_type': 'volume',
         'auth_url': CONF.keystone_gce_url,
@@ -105,7 +175,6 @@ def cinder(context):
     }
 
     _cinder = cinderclient.Client('1', **args)
-    management_url = _url_for(context, service_type='volume')
     _cinder.client.auth_token = context.auth_token
     _cinder.client.management_url = management_url
 
@@ -113,29 +182,101 @@ def cinder(context):
 
 
 def keystone(context):
-    _keystone = kc.Client(
-        token=context.auth_token,
-        tenant_id=context.project_id,
-        auth_url=CONF.keystone_gce_url)
+    return _get_pooled_client(
+        context, 'identity', CONF.keystone_gce_url,
+        lambda: kc.Client(token=context.auth_token,
+                          tenant_id=context.project_id,
+                          auth_url=CONF.keystone_gce_url))
+
+
+_client_pool = None
+
+
+def _get_client_pool():
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = cache.TTLCache(CONF.client_pool_size,
+                                      CONF.client_pool_ttl)
+    return _client_pool
+
 
-    return _keystone
+def _get_pooled_client(context, service_type, endpoint, create_client):
+    """Returns client from the pool, creates it if necessary.
+
+    Clients are shared by all requests which carry the same auth token.
+    """
+    key = (context.auth_token, service_type, endpoint)
+    pool = _get_client_pool()
+    client = pool.get(key)
+    if client is None:
+        client = create_client()
+        pool.set(key, client)
+    return client
+
+
+def clear_client_pool():
+    if _client_pool is not None:
+        _client_pool.clear()
+
+
+_service_catalog_cache = None
+
+
+def _get_service_catalog_cache():
+    global _service_catalog_cache
+    if _service_catalog_cache is None:
+        _service_catalog_cache = cache.TTLCache(
+            CONF.service_catalog_cache_size, CONF.service_catalog_cache_ttl)
+    return _service_catalog_cache
+
+
+def clear_service_catalog_cache():
+    if _service_catalog_cache is not None:
+        _service_catalog_cache.clear()
+
+
+def get_service_catalog_cache_stats():
+    return _get_service_catalog_cache().get_stats()
 
 
 def _url_for(context, **kwargs):
-    service_catalog = context.service_catalog
-    if not service_catalog:
+    service_type = kwargs["service_type"]
+    return _get_endpoints(context).get(service_type)
+
+
+def _get_endpoints(context):
+    """Returns public URLs of project's services by service type.
+
+    Service catalog passed by Keystone middleware is used if present.
+    Otherwise endpoints are looked up in the process-wide cache, and only
+    if they aren't found there, the catalog is requested from Keystone.
+    """
+    region = CONF.os_region_name
+    if context.service_catalog:
+        return _parse_service_catalog(context.service_catalog, region)
+
+    key = (context.project_id, region)
+    catalog_cache = _get_service_catalog_cache()
+    endpoints = catalog_cache.get(key)
+    if endpoints is None:
         catalog = keystone(context).service_catalog.catalog
         service_catalog = catalog["serviceCatalog"]
         context.service_catalog = service_catalog
+        endpoints = _parse_service_catalog(service_catalog, region)
+        catalog_cache.set(key, endpoints)
+    return endpoints
 
-    service_type = kwargs["service_type"]
+
+def _parse_service_catalog(service_catalog, region):
+    endpoints = {}
     for service in service_catalog:
-        if service["type"] != service_type:
+        service_type = service["type"]
+        if service_type in endpoints:
             continue
         for endpoint in service["endpoints"]:
+            if region is not None and endpoint.get("region") != region:
+                continue
             if "publicURL" in endpoint:
-                return endpoint["publicURL"]
-        else:
-            return None
-
-    return None
+                endpoints[service_type] = endpoint["publicURL"]
+                break
+    return endpoints
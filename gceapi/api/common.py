@@ -14,18 +14,39 @@
 
 """Base GCE API controller"""
 
+import base64
+import functools
+import hashlib
+import heapq
 import os.path
-import re
+
+import eventlet
+from oslo.config import cfg
 from webob import exc
 
+from gceapi.api import filters
 from gceapi.api import operation_api
 from gceapi.api import operation_util
 from gceapi.api import scopes
 from gceapi.api import utils
 from gceapi import exception
 from gceapi.openstack.common.gettextutils import _
+from gceapi.openstack.common import jsonutils
 from gceapi.openstack.common import timeutils
 
+aggregated_list_opts = [
+    cfg.IntOpt('aggregated_list_concurrency',
+               default=10,
+               help='Maximum number of zones or regions whose items are '
+                    'collected concurrently for an aggregated list'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(aggregated_list_opts)
+
+# Types of values of page token markers besides None
+MARKER_TYPES = (basestring, int, long, float)
+
 
 class Controller(object):
     """Base controller
@@ -39,6 +60,10 @@ class Controller(object):
     """
 
     _api = None
+    # GCE fields of formatted items which values are taken as is from
+    # fields of API items. Lists are filtered and paged by them before
+    # formatting.
+    RAW_FIELDS = {"name": "name"}
 
     # Initialization
     def __init__(self, api):
@@ -66,7 +91,10 @@ class Controller(object):
             return self._format_error(action_result)
         if action_result is None:
             return None, 204
-        return self._format_output(request, action, action_result), 200
+        try:
+            return self._format_output(request, action, action_result), 200
+        except exc.HTTPBadRequest as ex:
+            return self._format_error(ex)
 
     # Base methods, should be overriden
 
@@ -86,14 +114,20 @@ class Controller(object):
         context = self._get_context(req)
         scope = self._get_scope(req, scope_id)
 
-        items = self._api.get_items(context, scope)
+        page = self._select_page(req, context, scope)
+        if page is not None:
+            items, next_page_token = page
+            items = [self.format_item(req, i, scope) for i in items]
+            return self._format_list(req, items, next_page_token, scope)
+
+        items = self._get_items(req, context, scope)
         items = [{
             "scope": scope,
-            "item": self.format_item(req, i, scope)
+            "raw_item": i,
         } for i in items]
         items = self._filter_items(req, items)
         items, next_page_token = self._page_items(req, items)
-        items = [i["item"] for i in items]
+        items = [self._get_formatted_item(req, i) for i in items]
 
         return self._format_list(req, items, next_page_token, scope)
 
@@ -113,26 +147,62 @@ class Controller(object):
         """GCE aggregated list requests for all zones/regions."""
 
         context = self._get_context(req)
-        items = list()
-        for item in self._api.get_items(context, None):
-            for scope in self._api.get_scopes(context, item):
-                items.append({
-                    "scope": scope,
-                    "item": self.format_item(req, item, scope)
-                })
-        items = self._filter_items(req, items)
-        items, next_page_token = self._page_items(req, items)
+        page = self._select_page(req, context, None)
+        aggregation_scopes = None
+        if page is not None:
+            api_items, next_page_token = page
+        else:
+            aggregation_scopes = self._api.get_aggregation_scopes(context)
+            if aggregation_scopes is None:
+                api_items = self._get_items(req, context, None)
+        if aggregation_scopes is not None:
+            items = self._collect_scope_items(req, context,
+                                              aggregation_scopes)
+        else:
+            items = list()
+            for item in api_items:
+                for scope in self._api.get_scopes(context, item):
+                    items.append({
+                        "scope": scope,
+                        "raw_item": item,
+                    })
+        if page is None:
+            items = self._filter_items(req, items)
+            items, next_page_token = self._page_items(req, items)
 
         items_by_scopes = {}
         for item in items:
             scope_path = item["scope"].get_path()
             items_by_scope = items_by_scopes.setdefault(scope_path,
                 {self._collection_name: []})[self._collection_name]
-            items_by_scope.append(item["item"])
+            items_by_scope.append(self._get_formatted_item(req, item))
 
         return self._format_list(req, items_by_scopes, next_page_token,
             scopes.AggregatedScope())
 
+    def _collect_scope_items(self, req, context, aggregation_scopes):
+        """Gets items of the scopes concurrently.
+
+        Items are returned in order of the scopes, so the result doesn't
+        depend on which scope is answered first.
+        """
+        def get_scope_items(scope):
+            return [{
+                "scope": scope,
+                "raw_item": i,
+            } for i in self._get_items(req, context, scope)]
+
+        pool_size = min(len(aggregation_scopes),
+                        CONF.aggregated_list_concurrency)
+        if context.db_unit_of_work is not None:
+            # database session of the request can't be used concurrently
+            pool_size = 1
+        pool = eventlet.GreenPool(max(pool_size, 1))
+        items = list()
+        for scope_items in pool.imap(get_scope_items, aggregation_scopes):
+            items.extend(scope_items)
+        return items
+
     def delete(self, req, id, scope_id=None):
         """GCE delete requests."""
 
@@ -155,67 +225,209 @@ class Controller(object):
                                       self._type_name, body["name"], scope)
         self._api.add_item(context, body['name'], body, scope)
 
+    # Querying in database
+    def _get_query(self, req):
+        """Returns filter and page of the request to select in database.
+
+        Returns None if the kind doesn't support database queries or the
+        filter can't be translated to database query.
+        """
+        query_fields = self._api.get_query_fields()
+        if not query_fields:
+            return None
+        query = {"filters": {}, "exclude": {}, "prefixes": [],
+                 "sort_key": None, "limit": None, "marker": None}
+        list_filter = self._get_filter(req)
+        for clause in list_filter.clauses if list_filter else []:
+            column = query_fields.get(clause.field)
+            if column is None or clause.comparison not in ("eq", "ne"):
+                return None
+            if clause.value is not None and clause.comparison == "ne":
+                query["exclude"].setdefault(column, []).append(clause.value)
+            elif clause.value is not None:
+                if query["filters"].get(column,
+                                        clause.value) != clause.value:
+                    return None
+                query["filters"][column] = clause.value
+            elif clause.prefix is not None:
+                query["prefixes"].append((column, clause.prefix,
+                                          clause.comparison == "eq"))
+            else:
+                return None
+        limit = self._get_page_size(req)
+        if limit is not None:
+            query.update({"sort_key": query_fields.get("name"),
+                          "limit": limit,
+                          "marker": self._parse_page_token(req)})
+        return query
+
+    def _query_items(self, req, context, scope, query):
+        items, next_marker = self._api.get_items_by_query(context, scope,
+                                                          query)
+        next_page_token = None
+        if next_marker is not None:
+            next_page_token = self._make_page_token(req, next_marker)
+        return items, next_page_token
+
     # Filtering
-    def _filter_items(self, req, items):
-        """Filtering result list
+    def _get_filter(self, req):
+        """Returns compiled filter of the request or None."""
+        if not req.params.get("filter"):
+            return None
+        try:
+            return filters.compile_filter(req.params["filter"])
+        except exception.InvalidInput as ex:
+            raise exc.HTTPBadRequest(explanation=ex.format_message())
 
-        Only one filter is supported(eg. by one field)
-        Only two comparison strings are supported: 'eq' and 'ne'
-        There are no logical expressions with fields
+    def _get_items(self, req, context, scope):
+        """Returns items of the list.
+
+        Filter clauses which OpenStack can select items by are passed to it.
         """
-        if not items:
-            return items
-        if "filter" not in req.params:
-            return items
+        list_filter = self._get_filter(req)
+        search_fields = self._api.get_search_fields()
+        search_opts = {}
+        for clause in list_filter.clauses if list_filter else []:
+            option = search_fields.get(clause.field)
+            if (option is not None and clause.comparison == "eq" and
+                    clause.value is not None):
+                search_opts.setdefault(option, clause.value)
+        if search_opts:
+            return self._api.search_items(context, search_opts, scope)
+        return self._api.get_items(context, scope)
 
-        filter_def = req.params["filter"].split()
-        if len(filter_def) != 3:
-            # TODO(apavlov): raise exception
-            return items
-        if filter_def[1] != "eq" and filter_def[1] != "ne":
-            # TODO(apavlov): raise exception
-            return items
-        if filter_def[0] not in items[0]["item"]:
-            # TODO(apavlov): raise exception
+    def _filter_items(self, req, items):
+        """Returns list items which match filter of the request."""
+        list_filter = self._get_filter(req)
+        if list_filter is None:
             return items
+        return [item for item in items
+                if list_filter.match(
+                    functools.partial(self._get_list_field, req, item))]
 
-        filter_field = filter_def[0]
-        filter_cmp = filter_def[1] == "eq"
-        filter_pattern = filter_def[2]
-        if filter_pattern[0] == "'" and filter_pattern[-1] == "'":
-            filter_pattern = filter_pattern[1:-1]
+    # Paging
+    def _get_page_size(self, req):
+        if "maxResults" not in req.params:
+            return None
+        try:
+            limit = int(req.params["maxResults"])
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            msg = _("Invalid value for field 'maxResults': %s")
+            raise exc.HTTPBadRequest(
+                explanation=msg % req.params["maxResults"])
+        return limit
+
+    def _get_list_fingerprint(self, req):
+        # a page token is valid for the list and the filter it's issued for
+        list_id = u"%s %s" % (req.path_info, req.params.get("filter", ""))
+        return hashlib.md5(list_id.encode("utf-8")).hexdigest()
+
+    def _make_page_token(self, req, marker):
+        """Makes opaque token of the page after the marker.
+
+        marker is a list of sort key values of the last item of the page.
+        """
+        token = jsonutils.dumps({"list": self._get_list_fingerprint(req),
+                                 "marker": marker})
+        return base64.urlsafe_b64encode(token)
 
-        result_list = list()
-        for item in items:
-            field = item["item"][filter_field]
-            result = re.match(filter_pattern, field)
-            if filter_cmp != (result is None):
-                result_list.append(item)
+    def _parse_page_token(self, req, sizes=(2,)):
+        """Returns marker of the request page token or None.
 
-        return result_list
+        The marker must be a list of scalar values of one of sizes.
+        """
+        token = req.params.get("pageToken")
+        if not token:
+            return None
+        try:
+            page = jsonutils.loads(base64.urlsafe_b64decode(str(token)))
+            marker = page["marker"]
+            if (page["list"] == self._get_list_fingerprint(req) and
+                    isinstance(marker, list) and len(marker) in sizes and
+                    all(value is None or isinstance(value, MARKER_TYPES)
+                        for value in marker)):
+                return marker
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            pass
+        raise self._invalid_page_token(req)
+
+    def _invalid_page_token(self, req):
+        msg = _("Invalid value for field 'pageToken': %s")
+        return exc.HTTPBadRequest(explanation=msg % req.params["pageToken"])
+
+    def _select_page(self, req, context, scope):
+        """Selects the page of items in database or OpenStack.
+
+        Returns items and next page token or None if the page can't be
+        selected there, then the whole list is filtered and paged here.
+        """
+        query = self._get_query(req)
+        if query is not None:
+            return self._query_items(req, context, scope, query)
+        limit = self._get_page_size(req)
+        if limit is None or self._get_filter(req) is not None:
+            return None
+        # OpenStack markers are item ids, lists paged here have markers of
+        # name and scope
+        marker = self._parse_page_token(req, sizes=(1, 2))
+        page = self._api.get_items_page(
+            context, scope, limit,
+            marker[0] if marker and len(marker) == 1 else None)
+        if page is None:
+            return None
+        if marker is not None and len(marker) != 1:
+            raise self._invalid_page_token(req)
+        items, next_marker = page
+        next_page_token = None
+        if next_marker is not None:
+            next_page_token = self._make_page_token(req, [next_marker])
+        return items, next_page_token
 
-    # Paging
     def _page_items(self, req, items):
-        if not items:
-            return items, None
-        if "maxResults" not in req.params:
-            return items, None
+        """Returns the page of items and next page token.
 
-        limit = int(req.params["maxResults"])
-        if limit >= len(items):
+        Items are ordered by name and scope. Only items after the marker of
+        the token are selected, and the page is taken from them without
+        sorting of the whole list.
+        """
+        limit = self._get_page_size(req)
+        if limit is None:
             return items, None
 
-        page_index = int(req.params.get("pageToken", 0))
-        if page_index < 0 or page_index * limit > len(items):
-            # TODO(apavlov): raise exception
-            return [], None
-
-        items.sort(None, lambda x: x["item"].get("name"))
-        start = limit * page_index
-        if start + limit >= len(items):
-            return items[start:], None
+        marker = self._parse_page_token(req)
+        if marker is not None:
+            items = [item for item in items
+                     if self._get_page_key(req, item) > marker]
+        # one more item is taken to find out if there is next page
+        items = heapq.nsmallest(limit + 1, items,
+                                key=lambda x: self._get_page_key(req, x))
+        if len(items) <= limit:
+            return items, None
 
-        return items[start:start + limit], str(page_index + 1)
+        items = items[:limit]
+        next_marker = self._get_page_key(req, items[-1])
+        return items, self._make_page_token(req, next_marker)
+
+    def _get_page_key(self, req, item):
+        scope = item["scope"]
+        return [self._get_list_field(req, item, "name"),
+                scope.get_path() if scope is not None else None]
+
+    # Lazy formatting of list items
+    def _get_formatted_item(self, req, item):
+        """Formats list item on first access to its GCE fields."""
+        if "item" not in item:
+            item["item"] = self.format_item(req, item["raw_item"],
+                                            item["scope"])
+        return item["item"]
+
+    def _get_list_field(self, req, item, field):
+        raw_field = self.RAW_FIELDS.get(field)
+        if raw_field is not None:
+            return item["raw_item"].get(raw_field)
+        return self._get_formatted_item(req, item).get(field)
 
     # Utility
     def _get_context(self, req):
@@ -351,39 +563,13 @@ class Controller(object):
             }, code
 
     def _format_output(self, request, action, action_result):
-        # TODO(ft): this metod must be safe and ignore unknown fields
-        fields = request.params.get('fields', None)
-        # TODO(ft): GCE can also format results of other action
-        if action not in ('index', 'show') or fields is None:
-            return action_result
-
-        if action == 'show':
-            action_result = utils.apply_template(fields, action_result)
+        """Returns result projected by fields parameter of the request."""
+        fields = request.params.get('fields')
+        if not fields:
             return action_result
-        sp = utils.split_by_comma(fields)
-        top_level = []
-        items = []
-        for string in sp:
-            if 'items' in string:
-                items.append(string)
-            else:
-                top_level.append(string)
-        res = {}
-        if len(items) > 0:
-            res['items'] = []
-        for string in top_level:
-            dct = utils.apply_template(string, action_result)
-            for key, val in dct.items():
-                res[key] = val
-        for string in items:
-            if '(' in string:
-                dct = utils.apply_template(string, action_result)
-                for key, val in dct.items():
-                    res[key] = val
-            elif string.startswith('items/'):
-                string = string[len('items/'):]
-                for element in action_result['items']:
-                    dct = utils.apply_template(string, element)
-                    res['items'].append(dct)
-
-        return res
+        try:
+            plan = utils.compile_template(fields)
+        except ValueError:
+            msg = _("Invalid value for field 'fields': %s") % fields
+            raise exc.HTTPBadRequest(explanation=msg)
+        return utils.apply_plan(plan, action_result)
@@ -0,0 +1,129 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Reconciliation of GCE API database with OpenStack.
+
+List requests find database items of vanished OpenStack resources and
+OpenStack resources which get database items on first sight (e.g. auto-named
+addresses). Such changes are queued in the request context and applied in
+background after the request, no more often than once in
+db_reconcile_interval seconds for a kind of items of a project. So list
+requests don't write to database.
+"""
+
+import copy
+import threading
+
+from oslo.config import cfg
+
+from gceapi.api import cache
+from gceapi.openstack.common.gettextutils import _
+from gceapi.openstack.common import log as logging
+
+db_reconciler_opts = [
+    cfg.BoolOpt('db_deferred_reconcile',
+                default=True,
+                help='Apply database changes found by list requests in '
+                     'background after the request instead of during it'),
+    cfg.IntOpt('db_reconcile_interval',
+               default=10,
+               help='Minimal seconds between background reconciliations of '
+                    'a kind of items of a project'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(db_reconciler_opts)
+
+LOG = logging.getLogger(__name__)
+
+# Maximum number of remembered reconciliations of (project, kind)
+RECENT_RUNS_SIZE = 10000
+
+_recent_runs = cache.TTLCache(RECENT_RUNS_SIZE)
+_recent_runs_lock = threading.Lock()
+
+
+def defer(context, api, obsolete_items=None, new_items=None):
+    """Queues changes of database items of the api found by the request.
+
+    obsolete_items are deleted, new_items are added unless their ids are
+    already in database at the time of the reconciliation. Changes are
+    applied at once if deferring is disabled or the request is over.
+    """
+    if not obsolete_items and not new_items:
+        return
+    job = (api,
+           [item["id"] for item in obsolete_items or []],
+           [api._make_db_item(item) for item in new_items or []])
+    jobs = getattr(context, "db_reconcile", None)
+    if not CONF.db_deferred_reconcile or jobs is None:
+        _reconcile(context, [job])
+        return
+    jobs.append(job)
+
+
+def run_deferred(context):
+    """Starts reconciliation queued by the request in background."""
+    jobs = getattr(context, "db_reconcile", None)
+    context.db_reconcile = None
+    if not jobs:
+        return
+
+    allowed_kinds = set()
+    _recent_runs_lock.acquire()
+    try:
+        for kind in set(api._get_type() for api, dummy, dummy in jobs):
+            key = (context.project_id, kind)
+            if _recent_runs.get(key) is None:
+                _recent_runs.set(key, True, CONF.db_reconcile_interval)
+                allowed_kinds.add(kind)
+    finally:
+        _recent_runs_lock.release()
+    jobs = [job for job in jobs if job[0]._get_type() in allowed_kinds]
+    if not jobs:
+        return
+
+    # the request context is used by the request still, and its caches are
+    # outdated in the next request
+    context = copy.copy(context)
+    context.clear_caches()
+    _spawn(_reconcile, context, jobs)
+
+
+def reset():
+    """Forgets recent reconciliations."""
+    _recent_runs.clear()
+
+
+def _spawn(func, *args):
+    thread = threading.Thread(target=func, args=args)
+    thread.daemon = True
+    thread.start()
+
+
+def _reconcile(context, jobs):
+    for api, obsolete_ids, new_items in jobs:
+        try:
+            db_items = api._get_db_items_dict(context)
+            obsolete_items = [db_items[item_id] for item_id in obsolete_ids
+                              if item_id in db_items]
+            new_items = [item for item in new_items
+                         if str(item["id"]) not in db_items]
+            if obsolete_items:
+                api._delete_db_items(context, obsolete_items)
+            if new_items:
+                api._add_db_items(context, new_items)
+        except Exception:
+            LOG.exception(_("Failed to reconcile %s items with OpenStack"),
+                          api._get_type())
@@ -62,25 +62,33 @@ class API(base_api.API):
         volumes = [utils.to_dict(item) for item in volumes]
         if not volumes or len(volumes) != 1:
             raise exception.NotFound
-        return self._prepare_item(client, volumes[0])
+        return self._prepare_item(context, client, volumes[0])
 
     def get_items(self, context, scope=None):
+        return self.search_items(context, None, scope)
+
+    def get_search_fields(self):
+        return {"name": "display_name"}
+
+    def search_items(self, context, search_opts, scope):
         client = clients.cinder(context)
-        volumes = client.volumes.list()
+        volumes = client.volumes.list(search_opts=search_opts)
         volumes = self._filter_volumes_by_zone(volumes, scope)
         volumes = [utils.to_dict(item) for item in volumes]
         for volume in volumes:
-            self._prepare_item(client, volume)
+            self._prepare_item(context, client, volume)
         return volumes
 
     def get_scopes(self, context, item):
         return [scopes.ZoneScope(item["availability_zone"])]
 
-    def _prepare_item(self, client, item):
+    def _prepare_item(self, context, client, item):
         snapshot = None
         snapshot_id = item["snapshot_id"]
         if snapshot_id:
-            snapshot = utils.to_dict(client.volume_snapshots.get(snapshot_id))
+            snapshot = utils.to_dict(self._get_os_item(
+                context, "snapshot", snapshot_id,
+                client.volume_snapshots.get))
         item["snapshot"] = snapshot
         item["status"] = self._status_map.get(item["status"], item["status"])
         item["name"] = item["display_name"]
@@ -105,6 +113,7 @@ class API(base_api.API):
                                        self._get_delete_item_progress,
                                        volumes[0].id)
         client.delete(volumes[0])
+        self._forget_os_item(context, "volume", volumes[0].id)
 
     def add_item(self, context, name, body, scope=None):
         sizeGb = int(body['sizeGb']) if 'sizeGb' in body else None
@@ -140,7 +149,7 @@ class API(base_api.API):
             availability_zone=scope.get_name())
         operation_util.set_item_id(context, volume.id)
 
-        return self._prepare_item(client, utils.to_dict(volume))
+        return self._prepare_item(context, client, utils.to_dict(volume))
 
     def _get_add_item_progress(self, context, volume_id):
         client = clients.cinder(context)
@@ -23,6 +23,10 @@ from gceapi.api import wsgi as gce_wsgi
 class Controller(gce_common.Controller):
     """GCE Disk controller"""
 
+    RAW_FIELDS = {"name": "display_name",
+                  "description": "display_description",
+                  "status": "status"}
+
     def __init__(self, *args, **kwargs):
         super(Controller, self).__init__(disk_api.API(),
                                          *args, **kwargs)
@@ -0,0 +1,221 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compiler of GCE list filters.
+
+A filter is an expression "field comparison literal" or several such
+expressions in parentheses, which all must match:
+
+    name eq 'instance-.*'
+    (status ne RUNNING) (networkInterfaces.networkIP eq 10\.0\.0\..*)
+
+field is a dotted path in an item, a list on the path matches if any of its
+elements matches. eq and ne compare values with a regular expression which
+must match the whole value, numbers are compared as numbers by eq, ne, lt,
+le, gt and ge.
+Compiled filters are cached by filter string.
+"""
+
+import re
+
+from gceapi.api import cache
+from gceapi import exception
+from gceapi.openstack.common.gettextutils import _
+
+# Maximum number of cached compiled filters
+FILTER_CACHE_SIZE = 1000
+
+REGEX_SPECIAL_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+_FIELD_PATH = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$")
+_REGEX_COMPARISONS = ("eq", "ne")
+_NUMBER_COMPARISONS = {
+    "eq": lambda x, y: x == y,
+    "ne": lambda x, y: x != y,
+    "lt": lambda x, y: x < y,
+    "le": lambda x, y: x <= y,
+    "gt": lambda x, y: x > y,
+    "ge": lambda x, y: x >= y,
+}
+
+_cache = cache.TTLCache(FILTER_CACHE_SIZE)
+
+
+def compile_filter(filter_string):
+    """Returns compiled filter, raises InvalidInput for a wrong one."""
+    compiled = _cache.get(filter_string)
+    if compiled is None:
+        compiled = Filter(_parse(filter_string))
+        _cache.set(filter_string, compiled)
+    return compiled
+
+
+class Filter(object):
+    """Compiled filter, a conjunction of clauses."""
+
+    def __init__(self, clauses):
+        self.clauses = clauses
+
+    def match(self, get_field):
+        """Checks an item.
+
+        get_field returns value of a top level field of the item by name,
+        so the item can be built lazily.
+        """
+        return all(clause.match(get_field) for clause in self.clauses)
+
+
+class Clause(object):
+    """One comparison of a filter.
+
+    value is the literal to compare with as is, if the literal has no
+    regular expression syntax, otherwise None. prefix is the literal
+    without trailing '.*', if the rest has no regular expression syntax,
+    otherwise None. Both can be used to select items by other means.
+    """
+
+    def __init__(self, field, comparison, literal):
+        self.field = field
+        self.path = field.split(".")
+        self.comparison = comparison
+        self.literal = literal
+        self.number = _to_number(literal)
+        self.value = None
+        self.prefix = None
+        self.regex = None
+        if comparison in _REGEX_COMPARISONS:
+            try:
+                self.regex = re.compile("(?:%s)\\Z" % literal)
+            except re.error:
+                raise exception.InvalidInput(
+                    reason=_("Invalid regular expression %s") % literal)
+            if not REGEX_SPECIAL_CHARS.search(literal):
+                self.value = literal
+            elif (literal.endswith(".*") and
+                    not REGEX_SPECIAL_CHARS.search(literal[:-2])):
+                self.prefix = literal[:-2]
+        elif self.number is None:
+            raise exception.InvalidInput(
+                reason=_("%(comparison)s needs a number, not %(literal)s") %
+                {"comparison": comparison, "literal": literal})
+
+    def match(self, get_field):
+        values = _get_values(get_field(self.path[0]), self.path[1:])
+        if self.comparison == "ne":
+            return not any(self._match_value(value, "eq")
+                           for value in values)
+        return any(self._match_value(value, self.comparison)
+                   for value in values)
+
+    def _match_value(self, value, comparison):
+        if (self.number is not None and
+                isinstance(value, (int, long, float)) and
+                not isinstance(value, bool)):
+            return _NUMBER_COMPARISONS[comparison](value, self.number)
+        if self.regex is None:
+            number = _to_number(value)
+            return (number is not None and
+                    _NUMBER_COMPARISONS[comparison](number, self.number))
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        elif isinstance(value, (int, long, float)):
+            value = str(value)
+        elif not isinstance(value, basestring):
+            return False
+        return self.regex.match(value) is not None
+
+
+def _get_values(value, path):
+    """Returns values found by path in value, flattening lists."""
+    if isinstance(value, (list, tuple)):
+        return [v for element in value for v in _get_values(element, path)]
+    if not path:
+        return [] if value is None else [value]
+    if not isinstance(value, dict):
+        return []
+    return _get_values(value.get(path[0]), path[1:])
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, long, float)):
+        return value
+    if not isinstance(value, basestring):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse(filter_string):
+    text = filter_string.strip()
+    if not text.startswith("("):
+        return [_parse_clause(text)]
+
+    clauses = []
+    pos = 0
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        if text[pos] != "(":
+            raise _invalid_filter(filter_string)
+        end = _find_closing_bracket(text, pos)
+        if end is None:
+            raise _invalid_filter(filter_string)
+        clauses.append(_parse_clause(text[pos + 1:end]))
+        pos = end + 1
+    return clauses
+
+
+def _find_closing_bracket(text, start):
+    depth = 0
+    quoted = False
+    pos = start
+    while pos < len(text):
+        char = text[pos]
+        if char == "\\":
+            pos += 1
+        elif char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    return None
+
+
+def _parse_clause(text):
+    parts = text.strip().split(None, 2)
+    if (len(parts) != 3 or not _FIELD_PATH.match(parts[0]) or
+            parts[1] not in _NUMBER_COMPARISONS):
+        raise _invalid_filter(text)
+    field, comparison, literal = parts
+    literal = literal.strip()
+    if len(literal) > 1 and literal[0] == "'" and literal[-1] == "'":
+        literal = literal[1:-1]
+    return Clause(field, comparison, literal)
+
+
+def _invalid_filter(text):
+    return exception.InvalidInput(reason=_("Invalid filter %s") % text)
@@ -76,17 +76,48 @@ class API(base_api.API):
         return result
 
     def get_items(self, context, scope=None):
+        gce_images = self._get_db_items_dict(context)
+        items = self._list_images(context, {}, gce_images)
+        self._purge_db(context, items, gce_images)
+        return items
+
+    def get_search_fields(self):
+        return {"name": "name"}
+
+    def search_items(self, context, search_opts, scope):
+        return self._list_images(context, search_opts,
+                                 self._get_db_items_dict(context))
+
+    def _list_images(self, context, filters, gce_images):
         image_service = clients.glance(context).images
-        images = image_service.list(filters={"disk_format": "raw"})
+        images = image_service.list(filters=dict(filters, disk_format="raw"))
         items = list()
-        gce_images = self._get_db_items_dict(context)
         for image in images:
             result = self._prepare_image(utils.to_dict(image))
             self._prepare_item(result, gce_images.get(result["id"]))
             items.append(result)
-        self._purge_db(context, items, gce_images)
         return items
 
+    def get_items_page(self, context, scope, limit, marker):
+        image_service = clients.glance(context).images
+        # one more image is requested to find out if there is next page,
+        # page_size makes it one request to glance
+        images = list(image_service.list(filters={"disk_format": "raw"},
+                                         sort_key="name", sort_dir="asc",
+                                         marker=marker, limit=limit + 1,
+                                         page_size=limit + 1))
+        next_marker = None
+        if len(images) > limit:
+            images = images[:limit]
+            next_marker = images[-1].id
+        items = list()
+        for image in images:
+            result = self._prepare_image(utils.to_dict(image))
+            db_image = self._get_db_item_by_id(context, result["id"])
+            self._prepare_item(result, db_image)
+            items.append(result)
+        return items, next_marker
+
     def _prepare_image(self, item):
         item["status"] = self._status_map.get(item["status"], item["status"])
         return item
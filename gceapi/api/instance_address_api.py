@@ -28,6 +28,7 @@ class API(base_api.API):
     KIND = "access_config"
     PERSISTENT_ATTRIBUTES = ["id", "instance_name",
                              "nic", "name", "type", "addr"]
+    PARENT_ATTRIBUTE = "instance_name"
     DEFAULT_ACCESS_CONFIG_TYPE = "ONE_TO_ONE_NAT"
     DEFAULT_ACCESS_CONFIG_NAME = "External NAT"
 
@@ -40,17 +41,18 @@ class API(base_api.API):
     def _get_persistent_attributes(self):
         return self.PERSISTENT_ATTRIBUTES
 
+    def _get_parent_attribute(self):
+        return self.PARENT_ATTRIBUTE
+
     def get_item(self, context, instance_name, name):
-        items = self._get_db_items(context)
-        items = [i for i in items
-                if i["instance_name"] == instance_name and i["name"] == name]
+        items = self._get_db_items(context, instance_name)
+        items = [i for i in items if i["name"] == name]
         if len(items) != 1:
             raise exception.NotFound
         return items[0]
 
     def get_items(self, context, instance_name):
-        items = self._get_db_items(context)
-        return [i for i in items if i["instance_name"] == instance_name]
+        return self._get_db_items(context, instance_name)
 
     def add_item(self, context, instance_name, nic, addr, addr_type, name):
         if not nic:
@@ -116,6 +118,11 @@ class API(base_api.API):
 
     def register_item(self, context, instance_name,
                       nic, addr, addr_type, name):
+        new_item = self.build_item(instance_name, nic, addr, addr_type, name)
+        return self._add_db_item(context, new_item)
+
+    def build_item(self, instance_name, nic, addr, addr_type, name):
+        """Returns new item of the address without saving it to database."""
         if not nic:
             msg = _("Network interface is invalid or empty")
             raise exception.InvalidRequest(msg)
@@ -133,7 +140,7 @@ class API(base_api.API):
             msg = _("There is no address to assign.")
             raise exception.InvalidRequest(msg)
 
-        new_item = {
+        return {
             "id": instance_name + "-" + addr,
             "instance_name": instance_name,
             "nic": nic,
@@ -141,8 +148,6 @@ class API(base_api.API):
             "type": addr_type,
             "addr": addr
         }
-        new_item = self._add_db_item(context, new_item)
-        return new_item
 
     def delete_item(self, context, instance_name, name):
         client = clients.nova(context)
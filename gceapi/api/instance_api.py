@@ -16,6 +16,7 @@ import string
 
 from gceapi.api import base_api
 from gceapi.api import clients
+from gceapi.api import db_reconciler
 from gceapi.api import disk_api
 from gceapi.api import firewall_api
 from gceapi.api import instance_address_api
@@ -99,10 +100,45 @@ class API(base_api.API):
     def get_scopes(self, context, item):
         return [scopes.ZoneScope(item["OS-EXT-AZ:availability_zone"])]
 
+    def get_search_fields(self):
+        # nova selects instances which names contain the value
+        return {"name": "name"}
+
+    def get_items_page(self, context, scope, limit, marker):
+        client = clients.nova(context)
+        # one more instance is requested to find out if there is next page
+        instances = client.servers.list(marker=marker, limit=limit + 1)
+        next_marker = None
+        if len(instances) > limit:
+            instances = instances[:limit]
+            next_marker = instances[-1].id
+        # nova doesn't filter instances by zone for users, so a page of
+        # a zone can be shorter than limit. Items of the page are read
+        # from database one by one, because reading of all items costs as
+        # much as the whole list.
+        return (self._prepare_instances(context, client, instances, scope),
+                next_marker)
+
     def search_items(self, context, search_opts, scope):
         client = clients.nova(context)
         instances = client.servers.list(search_opts=search_opts)
+        if not search_opts:
+            self._load_volumes(context, instances)
+            # read all instances and their disks and access configs from
+            # database at once instead of per instance
+            self.load_db_items(context)
+            instance_disk_api.API().load_db_items(context)
+            instance_address_api.API().load_db_items(context)
+
+        filtered_instances = self._prepare_instances(context, client,
+                                                     instances, scope)
+        if len(filtered_instances) == len(instances) and not search_opts:
+            gce_instances = self._get_db_items_dict(context)
+            self._purge_db(context, filtered_instances, gce_instances)
 
+        return filtered_instances
+
+    def _prepare_instances(self, context, client, instances, scope):
         filtered_instances = []
         for instance in instances:
             iscope = getattr(instance, "OS-EXT-AZ:availability_zone")
@@ -114,13 +150,31 @@ class API(base_api.API):
             db_instance = self._get_db_item_by_id(context, instance["id"])
             self._prepare_item(instance, db_instance)
             filtered_instances.append(instance)
-
-        if len(filtered_instances) == len(instances) and not search_opts:
-            gce_instances = self._get_db_items_dict(context)
-            self._purge_db(context, filtered_instances, gce_instances)
-
         return filtered_instances
 
+    def _load_volumes(self, context, instances):
+        """Loads volumes of all instances with list requests to cinder.
+
+        _prepare_instance finds loaded volumes in the request context instead
+        of getting them one by one. Cinder truncates lists by its
+        osapi_max_limit, so volumes are paged by offset until all attached
+        volumes are loaded.
+        """
+        volume_ids = set(volume["id"] for instance in instances
+                         for volume in getattr(
+                             instance, "os-extended-volumes:volumes_attached"))
+        client = clients.cinder(context).volumes
+        loaded_ids = set()
+        while volume_ids - loaded_ids:
+            search_opts = {"offset": len(loaded_ids)} if loaded_ids else None
+            volumes = client.list(search_opts=search_opts)
+            volumes = [volume for volume in volumes
+                       if volume.id not in loaded_ids]
+            if not volumes:
+                break
+            self._set_os_items(context, "volume", volumes)
+            loaded_ids.update(volume.id for volume in volumes)
+
     def _prepare_instance(self, client, context, instance):
         instance["statusMessage"] = instance["status"]
         instance["status"] = self._status_map.get(
@@ -130,38 +184,39 @@ class API(base_api.API):
 
         cinder_client = clients.cinder(context)
         volumes = instance["os-extended-volumes:volumes_attached"]
-        instance["volumes"] = [utils.to_dict(
-            cinder_client.volumes.get(v["id"])) for v in volumes]
-        ads = instance_disk_api.API().get_items(context, instance["name"])
+        instance["volumes"] = [utils.to_dict(self._get_os_item(
+            context, "volume", v["id"], cinder_client.volumes.get))
+            for v in volumes]
+        # disks and access configs attached or detached outside of GCE API
+        # are registered or unregistered in database after the request
+        ad_api = instance_disk_api.API()
+        ads = ad_api.get_items(context, instance["name"])
         ads = dict((ad["volume_id"], ad) for ad in ads)
+        new_ads = []
         for volume in instance["volumes"]:
             ad = ads.pop(volume["id"], None)
             if not ad:
                 name = volume["display_name"]
-                ad = instance_disk_api.API().register_item(context,
-                    instance["name"], volume["id"], name)
+                ad = ad_api.build_item(instance["name"], volume["id"], name)
+                new_ads.append(ad)
             volume["device_name"] = ad["name"]
-        # NOTE(apavlov): cleanup unused from db for this instance
-        for ad in ads:
-            ad = instance_disk_api.API().unregister_item(context,
-                instance["name"], ads[ad]["name"])
+        db_reconciler.defer(context, ad_api, ads.values(), new_ads)
 
-        acs = instance_address_api.API().get_items(context, instance["name"])
+        ac_api = instance_address_api.API()
+        acs = ac_api.get_items(context, instance["name"])
         acs = dict((ac["addr"], ac) for ac in acs)
+        new_acs = []
         for network in instance["addresses"]:
             for address in instance["addresses"][network]:
                 if address["OS-EXT-IPS:type"] == "floating":
                     ac = acs.pop(address["addr"], None)
                     if not ac:
-                        ac = instance_address_api.API().register_item(context,
-                            instance["name"], network, address["addr"],
-                            None, None)
+                        ac = ac_api.build_item(instance["name"], network,
+                                               address["addr"], None, None)
+                        new_acs.append(ac)
                     address["name"] = ac["name"]
                     address["type"] = ac["type"]
-        # NOTE(apavlov): cleanup unused from db for this instance
-        for ac in acs:
-            ac = instance_address_api.API().unregister_item(context,
-                instance["name"], acs[ac]["name"])
+        db_reconciler.defer(context, ac_api, acs.values(), new_acs)
 
         return instance
 
@@ -237,6 +292,8 @@ class API(base_api.API):
         instance = utils.to_dict(instance)
         instance = self._prepare_instance(client, context, instance)
         self._delete_db_item(context, instance)
+        for volume in instance["volumes"]:
+            self._forget_os_item(context, "volume", volume["id"])
 
         ads = instance_disk_api.API().get_items(context, instance["name"])
         for ad in ads:
@@ -316,6 +373,7 @@ class API(base_api.API):
         for disk in disks:
             instance_disk_api.API().register_item(context, name,
                 disk["id"], disk["deviceName"])
+            self._forget_os_item(context, "volume", disk["id"])
 
         instance = utils.to_dict(client.servers.get(instance.id))
         instance = self._prepare_instance(client, context, instance)
@@ -32,6 +32,7 @@ class API(base_api.API):
 
     KIND = "attached_disk"
     PERSISTENT_ATTRIBUTES = ["id", "instance_name", "volume_id", "name"]
+    PARENT_ATTRIBUTE = "instance_name"
 
     def __init__(self, *args, **kwargs):
         super(API, self).__init__(*args, **kwargs)
@@ -48,17 +49,18 @@ class API(base_api.API):
     def _get_persistent_attributes(self):
         return self.PERSISTENT_ATTRIBUTES
 
+    def _get_parent_attribute(self):
+        return self.PARENT_ATTRIBUTE
+
     def get_item(self, context, instance_name, name):
-        items = self._get_db_items(context)
-        items = [i for i in items
-                if i["instance_name"] == instance_name and i["name"] == name]
+        items = self._get_db_items(context, instance_name)
+        items = [i for i in items if i["name"] == name]
         if len(items) != 1:
             raise exception.NotFound
         return items[0]
 
     def get_items(self, context, instance_name):
-        items = self._get_db_items(context)
-        return [i for i in items if i["instance_name"] == instance_name]
+        return self._get_db_items(context, instance_name)
 
     def add_item(self, context, instance_name, source, name):
         if not name:
@@ -96,11 +98,17 @@ class API(base_api.API):
         operation_util.start_operation(context, self._get_add_item_progress)
         volumes_client.create_server_volume(
             instance.id, volume["id"], "/dev/" + device_name)
+        self._forget_os_item(context, "volume", volume["id"])
 
         item = self.register_item(context, instance_name, volume["id"], name)
         operation_util.set_item_id(context, item["id"])
 
     def register_item(self, context, instance_name, volume_id, name):
+        new_item = self.build_item(instance_name, volume_id, name)
+        return self._add_db_item(context, new_item)
+
+    def build_item(self, instance_name, volume_id, name):
+        """Returns new item of the volume without saving it to database."""
         if not name:
             msg = _("There is no name to assign.")
             raise exception.InvalidRequest(msg)
@@ -108,14 +116,12 @@ class API(base_api.API):
             msg = _("There is no volume_id to assign.")
             raise exception.InvalidRequest(msg)
 
-        new_item = {
+        return {
             "id": instance_name + "-" + volume_id,
             "instance_name": instance_name,
             "volume_id": volume_id,
             "name": name,
         }
-        new_item = self._add_db_item(context, new_item)
-        return new_item
 
     def delete_item(self, context, instance_name, name):
         item = self.get_item(context, instance_name, name)
@@ -132,6 +138,7 @@ class API(base_api.API):
                                        self._get_delete_item_progress,
                                        item["id"])
         nova_client.volumes.delete_server_volume(instance.id, volume_id)
+        self._forget_os_item(context, "volume", volume_id)
 
         self._delete_db_item(context, item)
 
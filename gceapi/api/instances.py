@@ -31,6 +31,9 @@ logger = logging.getLogger(__name__)
 class Controller(gce_common.Controller):
     """GCE Instance controller"""
 
+    RAW_FIELDS = {"name": "name",
+                  "status": "status"}
+
     def __init__(self, *args, **kwargs):
         super(Controller, self).__init__(instance_api.API(),
                                          *args, **kwargs)
@@ -12,15 +12,70 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import threading
+import time
+
+from oslo.config import cfg
+
 from gceapi.api import base_api
+from gceapi.api import cache
 from gceapi.api import clients
 from gceapi.api import utils
 from gceapi.api import zone_api
 from gceapi import exception
+from gceapi.openstack.common.gettextutils import _
+from gceapi.openstack.common import log as logging
+
+flavor_cache_opts = [
+    cfg.IntOpt('flavor_cache_size',
+               default=1000,
+               help='Maximum number of projects whose flavors are cached'),
+    cfg.IntOpt('flavor_cache_ttl',
+               default=300,
+               help='Seconds cached flavors of a project are used, '
+                    '0 disables caching'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(flavor_cache_opts)
+
+LOG = logging.getLogger(__name__)
+
+# Part of flavor_cache_ttl after which flavors are reloaded in background
+# while cached ones are still returned
+REFRESH_AHEAD = 0.8
+
+_flavor_cache = None
+_refreshing_projects = set()
+_refreshing_lock = threading.Lock()
+
+
+def _get_flavor_cache():
+    global _flavor_cache
+    if _flavor_cache is None:
+        _flavor_cache = cache.TTLCache(CONF.flavor_cache_size,
+                                       CONF.flavor_cache_ttl)
+    return _flavor_cache
+
+
+def invalidate_flavor_cache(project_id=None):
+    """Drops cached flavors of the project or of all projects."""
+    if _flavor_cache is None:
+        return
+    if project_id is None:
+        _flavor_cache.clear()
+    else:
+        _flavor_cache.pop(project_id)
 
 
 class API(base_api.API):
-    """GCE Machine types API."""
+    """GCE Machine types API.
+
+    Flavors of a project are cached for flavor_cache_ttl seconds and indexed
+    by id and GCE name. Cached flavors are reloaded in background when they
+    are about to expire.
+    """
 
     KIND = "machineType"
 
@@ -32,6 +87,40 @@ class API(base_api.API):
         return self.KIND
 
     def get_item(self, context, name, scope=None):
+        catalog = self._get_catalog(context)
+        if catalog is None:
+            return self._find_item(context, name)
+        item = catalog["by_name"].get(name)
+        if item is None:
+            raise exception.NotFound
+        return copy.deepcopy(item)
+
+    def get_items(self, context, scope=None):
+        catalog = self._get_catalog(context)
+        if catalog is None:
+            client = clients.nova(context)
+            return [self._prepare_item(utils.to_dict(item))
+                    for item in client.flavors.list()]
+        return copy.deepcopy(catalog["items"])
+
+    def get_scopes(self, context, item):
+        # zones are loaded once per request, so aggregated list doesn't
+        # go to nova for every flavor
+        return self._zone_api.get_items_as_scopes(context)
+
+    def get_item_by_id(self, context, machine_type_id):
+        catalog = self._get_catalog(context)
+        if catalog is not None:
+            item = catalog["by_id"].get(str(machine_type_id))
+            if item is not None:
+                return copy.deepcopy(item)
+        # deleted flavors are not listed but still can be got by id
+        client = clients.nova(context)
+        item = self._get_os_item(context, "flavor", machine_type_id,
+                                 client.flavors.get)
+        return self._prepare_item(utils.to_dict(item))
+
+    def _find_item(self, context, name):
         client = clients.nova(context)
         try:
             item = client.flavors.find(name=self._from_gce(name))
@@ -42,20 +131,67 @@ class API(base_api.API):
             raise exception.NotFound
         return self._prepare_item(utils.to_dict(item))
 
-    def get_items(self, context, scope=None):
-        client = clients.nova(context)
-        items = client.flavors.list()
-        return [self._prepare_item(utils.to_dict(item))
-                for item in items]
+    def _get_catalog(self, context):
+        """Returns cached flavors of the project, loads them if needed.
 
-    def get_scopes(self, context, item):
-        # TODO(apavlov): too slow for all...
-        return self._zone_api.get_items_as_scopes(context)
+        Returns None if caching is disabled.
+        """
+        if CONF.flavor_cache_ttl <= 0:
+            return None
+        flavor_cache = _get_flavor_cache()
+        catalog = flavor_cache.get(context.project_id)
+        if catalog is None:
+            catalog = self._load_catalog(context)
+            flavor_cache.set(context.project_id, catalog)
+        elif (time.time() - catalog["loaded_at"] >
+                CONF.flavor_cache_ttl * REFRESH_AHEAD):
+            self._start_refresh(context)
+        return catalog
 
-    def get_item_by_id(self, context, machine_type_id):
+    def _load_catalog(self, context):
         client = clients.nova(context)
-        item = client.flavors.get(machine_type_id)
-        return self._prepare_item(utils.to_dict(item))
+        items = [self._prepare_item(utils.to_dict(item))
+                 for item in client.flavors.list()]
+        by_name = {}
+        for item in items:
+            # flavors which names differ in "." and "-" only can't be found
+            # by GCE name
+            if item["name"] in by_name:
+                by_name[item["name"]] = None
+            else:
+                by_name[item["name"]] = item
+        return {"loaded_at": time.time(),
+                "items": items,
+                "by_id": dict((str(item["id"]), item) for item in items),
+                "by_name": by_name}
+
+    def _start_refresh(self, context):
+        project_id = context.project_id
+        _refreshing_lock.acquire()
+        try:
+            if project_id in _refreshing_projects:
+                return
+            _refreshing_projects.add(project_id)
+        finally:
+            _refreshing_lock.release()
+        thread = threading.Thread(target=self._refresh_catalog,
+                                  args=[context])
+        thread.daemon = True
+        thread.start()
+
+    def _refresh_catalog(self, context):
+        try:
+            _get_flavor_cache().set(context.project_id,
+                                    self._load_catalog(context))
+        except Exception:
+            LOG.exception(_("Failed to refresh flavors of project %s"),
+                          context.project_id)
+        finally:
+            _refreshing_lock.acquire()
+            try:
+                _refreshing_projects.discard(context.project_id)
+            finally:
+                _refreshing_lock.release()
 
     def _prepare_item(self, item):
         item["name"] = self._to_gce(item["name"])
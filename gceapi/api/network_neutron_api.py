@@ -57,20 +57,52 @@ class API(base_api.API):
             # multi-results when addressed by name.
             network = networks[0]
             gce_network = self._get_db_item_by_id(context, network["id"])
-            return self._prepare_network(client, network, gce_network)
+            return self._prepare_network(context, client, network,
+                                         gce_network)
 
     def get_items(self, context, scope=None):
         client = clients.neutron(context)
         networks = client.list_networks(tenant_id=context.project_id)
         networks = networks["networks"]
         gce_networks = self._get_db_items_dict(context)
+        result_networks = self._prepare_networks(context, client, networks,
+                                                 gce_networks)
+        self._purge_db(context, result_networks, gce_networks)
+        return result_networks
+
+    def get_search_fields(self):
+        return {"name": "name"}
+
+    def search_items(self, context, search_opts, scope):
+        client = clients.neutron(context)
+        networks = client.list_networks(tenant_id=context.project_id,
+                                        **search_opts)["networks"]
+        return self._prepare_networks(context, client, networks,
+                                      self._get_db_items_dict(context))
+
+    def get_items_page(self, context, scope, limit, marker):
+        client = clients.neutron(context)
+        # one more network is requested to find out if there is next page
+        pages = client.list_networks(tenant_id=context.project_id,
+                                     sort_key="name", sort_dir="asc",
+                                     limit=limit + 1, marker=marker,
+                                     retrieve_all=False)
+        networks = next(iter(pages))["networks"]
+        ids = [network["id"] for network in networks]
+        if marker in ids:
+            # neutron has pagination disabled and returns all networks
+            networks = networks[ids.index(marker) + 1:]
+        next_marker = None
+        if len(networks) > limit:
+            networks = networks[:limit]
+            next_marker = networks[-1]["id"]
         result_networks = []
         for network in networks:
-            network = self._prepare_network(client, network,
-                                            gce_networks.get(network["id"]))
+            gce_network = self._get_db_item_by_id(context, network["id"])
+            network = self._prepare_network(context, client, network,
+                                            gce_network)
             result_networks.append(network)
-        self._purge_db(context, result_networks, gce_networks)
-        return result_networks
+        return result_networks, next_marker
 
     def delete_item(self, context, name, scope=None):
         client = clients.neutron(context)
@@ -116,7 +148,7 @@ class API(base_api.API):
                 "gateway_ip": gateway}
             result_data = client.create_subnet(subnet_body)
             subnet_id = result_data["subnet"]["id"]
-        network = self._prepare_network(client, network)
+        network = self._prepare_network(context, client, network)
         network["description"] = body.get("description")
         network = self._add_db_item(context, network)
         self._process_callbacks(
@@ -124,10 +156,16 @@ class API(base_api.API):
             network, subnet_id=subnet_id)
         return network
 
-    def _prepare_network(self, client, network, db_network=None):
+    def _prepare_networks(self, context, client, networks, gce_networks):
+        return [self._prepare_network(context, client, network,
+                                      gce_networks.get(network["id"]))
+                for network in networks]
+
+    def _prepare_network(self, context, client, network, db_network=None):
         subnets = network['subnets']
         if subnets and len(subnets) > 0:
-            subnet = client.show_subnet(subnets[0])
+            subnet = self._get_os_item(context, "subnet", subnets[0],
+                                       client.show_subnet)
             subnet = subnet["subnet"]
             network["subnet_id"] = subnet["id"]
             network["IPv4Range"] = subnet.get("cidr", None)
@@ -137,7 +175,12 @@ class API(base_api.API):
     def get_public_network_id(self, context):
         """Get id of public network appointed to GCE in config."""
         client = clients.neutron(context)
-        search_opts = {"name": self._public_network_name,
-                       "router:external": True}
-        networks = client.list_networks(**search_opts)["networks"]
-        return networks[0]["id"]
+
+        def load(name):
+            search_opts = {"name": name,
+                           "router:external": True}
+            networks = client.list_networks(**search_opts)["networks"]
+            return networks[0]["id"]
+
+        return self._get_os_item(context, "public_network",
+                                 self._public_network_name, load)
@@ -13,6 +13,7 @@
 #    under the License.
 
 import base64
+import hashlib
 import json
 import time
 import uuid
@@ -22,12 +23,29 @@ from keystoneclient.v2_0 import client as keystone_client
 from oslo.config import cfg
 import webob
 
+from gceapi.api import cache
+from gceapi.api import oauth_code_store
 from gceapi.openstack.common.gettextutils import _
 from gceapi.openstack.common import log as logging
 from gceapi.openstack.common import timeutils
 from gceapi import wsgi_ext as openstack_wsgi
 
+oauth_opts = [
+    cfg.IntOpt('oauth_token_cache_size',
+               default=10000,
+               help='Maximum number of OAuth tokens whose Keystone tokens '
+                    'are cached'),
+    cfg.IntOpt('oauth_token_expiry_margin',
+               default=60,
+               help='Seconds before expiration of Keystone token when '
+                    'the cached token is not used anymore'),
+    cfg.IntOpt('oauth_negative_cache_ttl',
+               default=10,
+               help='Seconds a rejected OAuth token is remembered'),
+]
+
 FLAGS = cfg.CONF
+FLAGS.register_opts(oauth_opts)
 LOG = logging.getLogger(__name__)
 
 
@@ -74,13 +92,8 @@ class Controller(object):
         "</form>"\
         "</body></html>"
 
-    class Client:
-        auth_start_time = 0
-        auth_token = None
-        expires_in = 1
-
-    # NOTE(apavlov): there is no cleaning of the dictionary
-    _clients = {}
+    def __init__(self):
+        self._codes = oauth_code_store.get_code_store(self.AUTH_TIMEOUT)
 
     def _check_redirect_uri(self, uri):
         if uri is None:
@@ -109,8 +122,9 @@ class Controller(object):
         self._check_redirect_uri(req.GET.get("redirect_uri"))
 
         code = base64.urlsafe_b64encode(uuid.uuid4().bytes).replace('=', '')
-        self._clients[code] = self.Client()
-        self._clients[code].auth_start_time = time.time()
+        self._codes.add(code, {"auth_start_time": time.time(),
+                               "auth_token": None,
+                               "expires_in": 1})
 
         html_page = self.AUTH_PAGE_TEMPLATE.format(
             redirect_uri=req.GET.get("redirect_uri"),
@@ -128,12 +142,12 @@ class Controller(object):
             json_body = {"error": "invalid_request"}
             raise OAuthFault(webob.exc.HTTPBadRequest(json_body=json_body))
 
-        client = self._clients.get(code)
+        client = self._codes.get(code)
         if client is None:
             json_body = {"error": "invalid_client"}
             raise OAuthFault(webob.exc.HTTPBadRequest(json_body=json_body))
 
-        if time.time() - client.auth_start_time > self.AUTH_TIMEOUT:
+        if time.time() - client["auth_start_time"] > self.AUTH_TIMEOUT:
             raise webob.exc.HTTPRequestTimeout()
 
         redirect_uri = req.POST.get("redirect_uri")
@@ -148,12 +162,15 @@ class Controller(object):
                 password=password,
                 auth_url=FLAGS.keystone_gce_url)
             token = keystone.auth_ref["token"]
-            client.auth_token = token["id"]
+            client["auth_token"] = token["id"]
             s = timeutils.parse_isotime(token["issued_at"])
             e = timeutils.parse_isotime(token["expires"])
-            client.expires_in = (e - s).seconds
+            client["expires_in"] = (e - s).seconds
         except Exception as ex:
             return webob.exc.HTTPUnauthorized(ex)
+        if not self._codes.update(code, client):
+            json_body = {"error": "invalid_grant"}
+            raise OAuthFault(webob.exc.HTTPBadRequest(json_body=json_body))
 
         if redirect_uri == self.INTERNAL_REDIRECT_URI:
             return "<html><body>Verification code is: "\
@@ -182,22 +199,32 @@ class Controller(object):
             raise OAuthFault(webob.exc.HTTPBadRequest(json_body=json_body))
 
         code = req.POST.get("code")
-        client = self._clients.get(code)
-        if client is None:
+        client = self._codes.get(code) if code is not None else None
+        if client is None or client["auth_token"] is None:
             json_body = {"error": "invalid_client"}
             raise OAuthFault(webob.exc.HTTPBadRequest(json_body=json_body))
+        # authorization code can be exchanged for token only once
+        self._codes.delete(code)
 
-        result = {"access_token": client.auth_token,
-                  "expires_in": client.expires_in,
+        result = {"access_token": client["auth_token"],
+                  "expires_in": client["expires_in"],
                   "token_type": "Bearer"}
         return json.dumps(result)
 
 
 class AuthProtocol(object):
-    """Filter for translating oauth token to keystone token."""
+    """Filter for translating oauth token to keystone token.
+
+    Keystone tokens are cached by OAuth token and project until they are
+    about to expire. Rejected OAuth tokens are cached for a short time too.
+    """
+
+    _REJECTED = object()
+
     def __init__(self, app):
         self.app = app
         self.keystone_url = FLAGS.keystone_gce_url
+        self._token_cache = cache.TTLCache(FLAGS.oauth_token_cache_size)
 
     def __call__(self, env, start_response):
         auth_token = env.get("HTTP_AUTHORIZATION")
@@ -205,15 +232,20 @@ class AuthProtocol(object):
             return self._reject_request(start_response)
 
         project = env["PATH_INFO"].split("/")[1]
-        try:
-            keystone = keystone_client.Client(
-                token=auth_token.split()[1],
-                tenant_name=project,
-                force_new_token=True,
-                auth_url=self.keystone_url)
-            env["HTTP_X_AUTH_TOKEN"] = keystone.auth_ref["token"]["id"]
-            return self.app(env, start_response)
-        except exceptions.Unauthorized:
+        oauth_token = auth_token.split()[1]
+        cache_key = (hashlib.sha256(oauth_token).hexdigest(), project)
+        keystone_token = self._token_cache.get(cache_key)
+        if keystone_token is None:
+            try:
+                keystone_token, ttl = self._get_keystone_token(oauth_token,
+                                                               project)
+            except exceptions.Unauthorized:
+                keystone_token = self._REJECTED
+                ttl = FLAGS.oauth_negative_cache_ttl
+            if ttl > 0:
+                self._token_cache.set(cache_key, keystone_token, ttl=ttl)
+
+        if keystone_token is self._REJECTED:
             if project in INTERNAL_GCUTIL_PROJECTS:
                 # NOTE(apavlov): return empty if no such projects(by gcutil)
                 headers = [('Content-type', 'application/json;charset=UTF-8')]
@@ -222,6 +254,23 @@ class AuthProtocol(object):
 
             return self._reject_request(start_response)
 
+        env["HTTP_X_AUTH_TOKEN"] = keystone_token
+        return self.app(env, start_response)
+
+    def _get_keystone_token(self, oauth_token, project):
+        """Returns id of project scoped token and time to cache it."""
+        keystone = keystone_client.Client(
+            token=oauth_token,
+            tenant_name=project,
+            force_new_token=True,
+            auth_url=self.keystone_url)
+        token = keystone.auth_ref["token"]
+        expires = timeutils.normalize_time(
+            timeutils.parse_isotime(token["expires"]))
+        ttl = (timeutils.delta_seconds(timeutils.utcnow(), expires) -
+               FLAGS.oauth_token_expiry_margin)
+        return token["id"], ttl
+
     def _reject_request(self, start_response):
         headers = [('Content-type', 'application/json;charset=UTF-8')]
         start_response('401 Unauthorized', headers)
@@ -0,0 +1,180 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Storages of OAuth authorization codes.
+
+Codes live from an authorization request till a token request. Each code
+expires if it isn't updated during its time to live. 'memory' store keeps
+codes in the API process, 'db' store keeps them in GCE API database to
+share them between API workers. update of a code which is expired or
+deleted already returns False.
+"""
+
+import threading
+import time
+
+from oslo.config import cfg
+
+from gceapi.api import cache
+from gceapi import context as gce_context
+from gceapi import db
+from gceapi import exception
+from gceapi.openstack.common.gettextutils import _
+from gceapi.openstack.common import log as logging
+
+oauth_code_store_opts = [
+    cfg.StrOpt('oauth_code_store',
+               default='memory',
+               help='Storage of OAuth authorization codes: memory or db. '
+                    'Use db if several API workers serve OAuth requests'),
+    cfg.IntOpt('oauth_code_store_size',
+               default=1000,
+               help='Maximum number of stored OAuth authorization codes'),
+    cfg.IntOpt('oauth_code_sweep_interval',
+               default=60,
+               help='Seconds between purges of expired OAuth authorization '
+                    'codes, 0 disables purging in background'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(oauth_code_store_opts)
+
+LOG = logging.getLogger(__name__)
+
+
+class MemoryCodeStore(object):
+    """Stores codes in process memory."""
+
+    def __init__(self, ttl, max_size):
+        self._codes = cache.TTLCache(max_size, ttl)
+
+    def add(self, code, data):
+        self._codes.set(code, dict(data))
+
+    def update(self, code, data):
+        if self._codes.get(code) is None:
+            return False
+        self._codes.set(code, dict(data))
+        return True
+
+    def get(self, code):
+        data = self._codes.get(code)
+        return dict(data) if data is not None else None
+
+    def delete(self, code):
+        self._codes.pop(code)
+
+    def purge_expired(self):
+        return self._codes.purge_expired()
+
+
+class DBCodeStore(object):
+    """Stores codes in GCE API database."""
+
+    KIND = "oauth_code"
+
+    def __init__(self, ttl, max_size):
+        self._ttl = ttl
+        self._max_size = max_size
+
+    def add(self, code, data):
+        context = gce_context.get_admin_context()
+        items = db.get_items(context, self.KIND)
+        if len(items) >= self._max_size:
+            items.sort(key=lambda item: item["updated_at"])
+            for item in items[:len(items) - self._max_size + 1]:
+                db.delete_item(context, self.KIND, item["id"])
+        db.add_item(context, self.KIND, self._pack(code, data))
+
+    def update(self, code, data):
+        context = gce_context.get_admin_context()
+        try:
+            db.update_item(context, self.KIND, self._pack(code, data))
+        except exception.NotFound:
+            # the code is purged or exchanged by another worker
+            return False
+        return True
+
+    def get(self, code):
+        context = gce_context.get_admin_context()
+        item = db.get_item_by_id(context, self.KIND, code)
+        if item is None or self._is_expired(item):
+            return None
+        return item
+
+    def delete(self, code):
+        context = gce_context.get_admin_context()
+        db.delete_item(context, self.KIND, code)
+
+    def purge_expired(self):
+        context = gce_context.get_admin_context()
+        expired = [item for item in db.get_items(context, self.KIND)
+                   if self._is_expired(item)]
+        for item in expired:
+            db.delete_item(context, self.KIND, item["id"])
+        return len(expired)
+
+    def _pack(self, code, data):
+        item = dict(data)
+        item["id"] = code
+        item["updated_at"] = time.time()
+        return item
+
+    def _is_expired(self, item):
+        return time.time() - item["updated_at"] > self._ttl
+
+
+_STORES = {
+    "memory": MemoryCodeStore,
+    "db": DBCodeStore,
+}
+
+_code_store = None
+_code_store_lock = threading.Lock()
+
+
+def get_code_store(ttl):
+    """Returns code store of the process, creates it on first call."""
+    global _code_store
+    _code_store_lock.acquire()
+    try:
+        if _code_store is None:
+            store_class = _STORES.get(CONF.oauth_code_store)
+            if store_class is None:
+                msg = (_("Invalid OAuth code store: %s") %
+                       CONF.oauth_code_store)
+                raise exception.GceapiException(msg)
+            _code_store = store_class(ttl, CONF.oauth_code_store_size)
+            if CONF.oauth_code_sweep_interval > 0:
+                _schedule_sweep(_code_store,
+                                CONF.oauth_code_sweep_interval)
+        return _code_store
+    finally:
+        _code_store_lock.release()
+
+
+def _schedule_sweep(store, interval):
+    timer = threading.Timer(interval, _sweep, [store, interval])
+    timer.daemon = True
+    timer.start()
+
+
+def _sweep(store, interval):
+    try:
+        count = store.purge_expired()
+        if count:
+            LOG.debug(_("Purged %d expired OAuth codes"), count)
+    except Exception:
+        LOG.exception(_("Failed to purge expired OAuth codes"))
+    _schedule_sweep(store, interval)
@@ -16,6 +16,7 @@ import uuid
 
 from gceapi.api import base_api
 from gceapi.api import scopes
+from gceapi import db
 from gceapi import exception
 from gceapi.openstack.common.gettextutils import _
 from gceapi.openstack.common import timeutils
@@ -63,15 +64,42 @@ class API(base_api.API):
         return operation
 
     def get_items(self, context, scope=None):
-        operations = self._get_db_items(context)
-        if scope is not None:
-            operations = [operation for operation in operations
-                          if (operation["scope_type"] == scope.get_type() and
-                              operation["scope_name"] == scope.get_name())]
+        operations = db.get_operations(context, self._get_scope_filters(scope))
         for operation in operations:
             operation = self._update_operation_progress(context, operation)
         return operations
 
+    def get_query_fields(self):
+        return {"name": "name", "status": "status"}
+
+    def get_items_by_query(self, context, scope, query):
+        filters = self._get_scope_filters(scope)
+        columns = (set(query["filters"]) | set(query["exclude"]) |
+                   set(column for column, dummy, dummy in query["prefixes"]))
+        if "status" in columns:
+            # statuses in database are updated on read, so running
+            # operations are checked before they are filtered by status
+            running_filters = dict(filters or {}, status="RUNNING")
+            for operation in db.get_operations(context, running_filters):
+                self._update_operation_progress(context, operation)
+        limit = query["limit"]
+        sort_key = query["sort_key"] or "insert_time"
+        filters = dict(filters or {}, **query["filters"])
+        operations = db.get_operations(
+            context, filters,
+            sort_key=sort_key,
+            limit=limit + 1 if limit is not None else None,
+            marker_values=query["marker"],
+            prefixes=query["prefixes"],
+            exclude=query["exclude"])
+        next_marker = None
+        if limit is not None and len(operations) > limit:
+            operations = operations[:limit]
+            next_marker = [operations[-1][sort_key], operations[-1]["id"]]
+        for operation in operations:
+            operation = self._update_operation_progress(context, operation)
+        return operations, next_marker
+
     def delete_item(self, context, name, scope=None):
         # NOTE(ft): Google deletes operation with no check it's scope
         item = self._get_db_item_by_name(context, name)
@@ -79,6 +107,33 @@ class API(base_api.API):
             raise exception.NotFound
         self._delete_db_item(context, item)
 
+    # Operations are kept in own table, where they are filtered and ordered
+    # by indexed columns, so generic item helpers are overriden
+    def _add_db_item(self, context, item):
+        db.add_operation(context, self._make_db_item(item))
+        return item
+
+    def _update_db_item(self, context, item):
+        db.update_operation(context, self._make_db_item(item))
+
+    def _delete_db_item(self, context, item):
+        db.delete_operation(context, item["id"])
+
+    def _get_db_items(self, context, parent_name=None):
+        return db.get_operations(context)
+
+    def _get_db_item_by_id(self, context, item_id):
+        return db.get_operation_by_id(context, item_id)
+
+    def _get_db_item_by_name(self, context, name):
+        return db.get_operation_by_name(context, name)
+
+    def _get_scope_filters(self, scope):
+        if scope is None:
+            return None
+        return {"scope_type": scope.get_type(),
+                "scope_name": scope.get_name()}
+
     def _update_operation_progress(self, context, operation):
         if operation["status"] == "DONE" or not operation.get("item_id"):
             return operation
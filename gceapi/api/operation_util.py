@@ -12,11 +12,46 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 import threading
+import time
+
+from oslo.config import cfg
 
 from gceapi.api import operation_api
+from gceapi import context as gce_context
+from gceapi import db
+from gceapi.openstack.common.gettextutils import _
+from gceapi.openstack.common import log as logging
 from gceapi.openstack.common import timeutils
 
+operation_retention_opts = [
+    cfg.IntOpt('operation_max_age',
+               default=0,
+               help='Seconds to keep finished operations, 0 keeps them '
+                    'regardless of age'),
+    cfg.IntOpt('operation_max_count',
+               default=0,
+               help='Number of newest finished operations to keep per '
+                    'project, 0 keeps them regardless of count'),
+    cfg.IntOpt('operation_purge_batch_size',
+               default=500,
+               help='Maximum number of operations deleted in one database '
+                    'transaction'),
+    cfg.IntOpt('operation_purge_interval',
+               default=0,
+               help='Seconds between purges of finished operations by API '
+                    'service, 0 disables purging in background'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(operation_retention_opts)
+
+LOG = logging.getLogger(__name__)
+
+_purger_started = False
+_purger_lock = threading.Lock()
+
 
 def init_operation(context, op_type, target_type, target_name, scope):
     if context.operation is not None:
@@ -30,13 +65,17 @@ def init_operation(context, op_type, target_type, target_name, scope):
 def save_operaton(context, action_result):
     if context.operation is None or context.operation_start_time is None:
         return None
-    return operation_api.API().save_operation(
+    if context.operation_saved:
+        return context.operation
+    operation = operation_api.API().save_operation(
             context,
             context.operation,
             context.operation_start_time,
             context.operation_get_progress_method,
             context.operation_item_id,
             action_result)
+    context.operation_saved = True
+    return operation
 
 
 def start_operation(context, get_progress_method=None, item_id=None):
@@ -55,6 +94,7 @@ def set_item_id(context, item_id):
 
 
 def continue_operation(context, func, timeout=5):
+    context.clear_caches()
     threading.Timer(timeout, _continue_operation, [context, func]).start()
 
 
@@ -71,3 +111,65 @@ def _continue_operation(context, func):
     else:
         operation_api.API().update_operation(context, operation["id"],
                                              operation_result)
+
+
+def purge_operations(max_age=None, max_count=None, batch_size=None):
+    """Deletes finished operations beyond retention limits.
+
+    Operations are deleted in batches of batch_size, each batch in own
+    transaction. Returns number of deleted operations.
+    """
+    if max_age is None:
+        max_age = CONF.operation_max_age
+    if max_count is None:
+        max_count = CONF.operation_max_count
+    if batch_size is None:
+        batch_size = CONF.operation_purge_batch_size
+    if max_age <= 0 and max_count <= 0:
+        return 0
+
+    insert_time_before = None
+    if max_age > 0:
+        insert_time_before = timeutils.isotime(
+            timeutils.utcnow() - datetime.timedelta(seconds=max_age), True)
+    keep_count = max_count if max_count > 0 else None
+    context = gce_context.get_admin_context()
+    total = 0
+    while True:
+        count = db.purge_operations(context, insert_time_before, keep_count,
+                                    batch_size)
+        if not count:
+            return total
+        total += count
+        # let other threads use database between batches
+        time.sleep(0)
+
+
+def start_purger():
+    """Starts periodic purge of finished operations if it's configured."""
+    global _purger_started
+    if CONF.operation_purge_interval <= 0:
+        return
+    _purger_lock.acquire()
+    try:
+        if not _purger_started:
+            _schedule_purge(CONF.operation_purge_interval)
+            _purger_started = True
+    finally:
+        _purger_lock.release()
+
+
+def _schedule_purge(interval):
+    timer = threading.Timer(interval, _purge, [interval])
+    timer.daemon = True
+    timer.start()
+
+
+def _purge(interval):
+    try:
+        count = purge_operations()
+        if count:
+            LOG.info(_("Purged %d finished operations"), count)
+    except Exception:
+        LOG.exception(_("Failed to purge finished operations"))
+    _schedule_purge(interval)
@@ -17,6 +17,7 @@ import string
 
 from gceapi.api import base_api
 from gceapi.api import clients
+from gceapi.api import db_reconciler
 from gceapi.api import network_api
 from gceapi.api import operation_util
 from gceapi.api import utils
@@ -171,19 +172,21 @@ class API(base_api.API):
                 aliased_routes[key] = gce_route_list
 
         # NOTE(ft): add new named routes
-        for os_route in os_routes.itervalues():
-            network = os_route["network"]
-            port = os_route["port"]
-            route = self._add_gce_route(context, network, port, os_route,
-                                       is_default=True,
-                                       creationTimestamp="")
-            os_route.update(route)
+        new_db_routes = [
+            self._make_gce_route(os_route["network"], os_route["port"],
+                                 os_route, is_default=True,
+                                 creationTimestamp="")
+            for os_route in os_routes.itervalues()]
+        db_reconciler.defer(context, self, new_items=new_db_routes)
+        for os_route, db_route in zip(os_routes.itervalues(), new_db_routes):
+            os_route.update(self._unpack_route_from_db_format(db_route))
             routes[os_route["name"]] = os_route
 
         # NOTE(ft): delete obsolete named routes
-        for gce_route_list in gce_routes.itervalues():
-            for gce_route in gce_route_list:
-                self._delete_db_item(context, gce_route)
+        obsolete_db_routes = [gce_route
+                              for gce_route_list in gce_routes.itervalues()
+                              for gce_route in gce_route_list]
+        db_reconciler.defer(context, self, obsolete_items=obsolete_db_routes)
         return (routes, aliased_routes)
 
     def _get_gce_routes(self, context):
@@ -333,6 +336,11 @@ class API(base_api.API):
         # TODO(ft): here is the good place to purge DB from routes
 
     def _add_gce_route(self, context, network, port, route, **kwargs):
+        db_route = self._make_gce_route(network, port, route, **kwargs)
+        db_route = self._add_db_item(context, db_route)
+        return self._unpack_route_from_db_format(db_route)
+
+    def _make_gce_route(self, network, port, route, **kwargs):
         db_route = {}
         for key in self.PERSISTENT_ATTRIBUTES:
             value = route.get(key)
@@ -353,8 +361,7 @@ class API(base_api.API):
                               get_from_dicts("nexthop", route, kwargs, ""),
                               get_from_dicts("name", route, kwargs)])
         db_route["id"] = route_id
-        db_route = self._add_db_item(context, db_route)
-        return self._unpack_route_from_db_format(db_route)
+        return db_route
 
     def _unpack_route_from_db_format(self, route):
         parts = route["id"].split("//")
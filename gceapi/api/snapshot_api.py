@@ -49,15 +49,23 @@ class API(base_api.API):
         snapshots = client.volume_snapshots.list(
             search_opts={"display_name": name})
         if snapshots and len(snapshots) == 1:
-            return self._prepare_item(client, utils.to_dict(snapshots[0]))
+            return self._prepare_item(context, client,
+                                      utils.to_dict(snapshots[0]))
         raise exception.NotFound
 
     def get_items(self, context, scope=None):
+        return self.search_items(context, None, scope)
+
+    def get_search_fields(self):
+        return {"name": "display_name"}
+
+    def search_items(self, context, search_opts, scope):
         client = clients.cinder(context)
         snapshots = [utils.to_dict(item)
-                     for item in client.volume_snapshots.list()]
+                     for item in client.volume_snapshots.list(
+                         search_opts=search_opts)]
         for snapshot in snapshots:
-            self._prepare_item(client, snapshot)
+            self._prepare_item(context, client, snapshot)
         return snapshots
 
     def delete_item(self, context, name, scope=None):
@@ -69,6 +77,7 @@ class API(base_api.API):
                                        self._get_delete_item_progress,
                                        snapshots[0].id)
         client.delete(snapshots[0])
+        self._forget_os_item(context, "snapshot", snapshots[0].id)
 
     def add_item(self, context, body, scope=None):
         name = body["name"]
@@ -83,12 +92,13 @@ class API(base_api.API):
             volumes[0].id, True, name, body["description"])
         operation_util.set_item_id(context, snapshot.id)
 
-        return self._prepare_item(client, utils.to_dict(snapshot))
+        return self._prepare_item(context, client, utils.to_dict(snapshot))
 
-    def _prepare_item(self, client, item):
+    def _prepare_item(self, context, client, item):
         item["name"] = item["display_name"]
         try:
-            item["disk"] = utils.to_dict(client.volumes.get(item["volume_id"]))
+            item["disk"] = utils.to_dict(self._get_os_item(
+                context, "volume", item["volume_id"], client.volumes.get))
         except Exception:
             pass
         item["status"] = self._status_map.get(item["status"], item["status"])
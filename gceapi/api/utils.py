@@ -14,13 +14,12 @@
 
 """Utilities and helper functions."""
 
+from gceapi.api import cache
 
-def _parse_slash(string):
-    res = ''
-    sp = string.split('/')
-    for element in reversed(sp):
-        res = {element: res}
-    return res
+# Maximum number of cached compiled templates of fields parameter
+TEMPLATE_CACHE_SIZE = 1000
+
+_templates = cache.TTLCache(TEMPLATE_CACHE_SIZE)
 
 
 def split_by_comma(string):
@@ -42,68 +41,91 @@ def split_by_comma(string):
     return sp
 
 
-def _parse_template(string):
-    sp = split_by_comma(string)
-
-    i = 0
-    while i < len(sp):
-        if '(' in sp[i]:
-            sp[i] = sp[i].replace('(', ' ').replace(')', ' ').split()
-        i += 1
-
-    json = {}
-    i = 0
-    while i < len(sp):
-        if isinstance(sp[i], list):
-            fields = sp[i][1].split(',')
-            json[sp[i][0]] = [{}]
-            for field in fields:
-                dct = _parse_slash(field)
-                key = dct.keys()[0]
-                json[sp[i][0]][0][key] = dct[key]
+def compile_template(template_string):
+    """Compiles fields template into a projection plan.
+
+    The plan is a dict of selected keys to plans of their values, None
+    selects the whole value. Key '*' selects all keys. Plans are cached by
+    template string. Raises ValueError for wrong template.
+    """
+    plan = _templates.get(template_string)
+    if plan is None:
+        plan, dummy = _parse_fields(template_string, 0, False)
+        _templates.set(template_string, plan)
+    return plan
+
+
+def apply_plan(plan, json, strict=False):
+    """Projects json by the plan in one pass.
+
+    Plan of a list is applied to its elements. Missing keys are skipped,
+    or ValueError is raised if strict is True.
+    """
+    if plan is None:
+        return json
+    if isinstance(json, list):
+        return [apply_plan(plan, element, strict) for element in json]
+    if not isinstance(json, dict):
+        raise ValueError()
+    res = {}
+    for key, val in plan.iteritems():
+        if key == '*':
+            keys = json.keys()
+        elif key in json:
+            keys = [key]
+        elif strict:
+            raise ValueError()
         else:
-            field = _parse_slash(sp[i])
-            key = field.keys()[0]
-            json[key] = field[key]
-        i += 1
-
-    return json
+            continue
+        for k in keys:
+            try:
+                res[k] = apply_plan(val, json[k], strict)
+            except ValueError:
+                if strict and key != '*':
+                    raise
+    return res
 
 
 def apply_template(template_string, json):
-
-    def apply_recursive(template, json):
-        res = {}
-        if template == '':
-            return json
-        for key, val in template.items():
-            if key in json and val == '':
-                res[key] = json[key]
-            elif key in json and val == '*':
-                pass
-            elif key in json and isinstance(val, list):
-                if not isinstance(json[key], list):
-                    raise ValueError()
-                array = []
-                for element in json[key]:
-                    r = apply_recursive(val[0], element)
-                    array.append(r)
-                res[key] = array
-            elif key in json and isinstance(val, dict):
-                r = apply_recursive(val, json[key])
-                res[key] = r
-            elif key not in json and key == '*':
-                for k, v in json.items():
-                    try:
-                        r = apply_recursive(val, v)
-                    except ValueError:
-                        continue
-                    res[k] = r
-            elif key not in json:
+    return apply_plan(compile_template(template_string), json, True)
+
+
+def _parse_fields(string, pos, nested):
+    plan = {}
+    while True:
+        start = pos
+        while pos < len(string) and string[pos] not in ',()':
+            pos += 1
+        path = string[start:pos].strip().split('/')
+        if not all(path):
+            raise ValueError()
+        val = None
+        if pos < len(string) and string[pos] == '(':
+            val, pos = _parse_fields(string, pos + 1, True)
+        for key in reversed(path[1:]):
+            val = {key: val}
+        _merge_plan(plan, path[0], val)
+
+        if pos == len(string):
+            if nested:
                 raise ValueError()
-        return res
-
-    return apply_recursive(_parse_template(template_string), json)
+            return plan, pos
+        if string[pos] == ')':
+            if not nested:
+                raise ValueError()
+            return plan, pos + 1
+        if string[pos] != ',':
+            raise ValueError()
+        pos += 1
+
+
+def _merge_plan(plan, key, val):
+    if val is None or plan.get(key, {}) is None:
+        plan[key] = None
+        return
+    target = plan.setdefault(key, {})
+    for k, v in val.iteritems():
+        _merge_plan(target, k, v)
 
 
 def to_dict(obj, recursive=False, classkey=None):
@@ -12,14 +12,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo.config import cfg
 import webob
 
+from gceapi.api import db_reconciler
+from gceapi.api import operation_util
+from gceapi import db
 from gceapi import exception
+from gceapi.openstack.common import excutils
 from gceapi.openstack.common.gettextutils import _
 from gceapi.openstack.common import jsonutils
 from gceapi.openstack.common import log as logging
 from gceapi import wsgi_ext as openstack_wsgi
 
+CONF = cfg.CONF
+CONF.import_opt('db_request_transaction', 'gceapi.db.api')
+
 LOG = logging.getLogger(__name__)
 
 
@@ -136,6 +144,31 @@ class GCEResource(openstack_wsgi.Resource):
             raise GCEFault(webob.exc.HTTPBadRequest(
                 explanation=msg))
 
+    def _dispatch(self, context, method, request, action_args):
+        """Dispatches action in one database transaction if configured."""
+        if not CONF.db_request_transaction:
+            return self.dispatch(method, request, action_args)
+
+        db.begin_unit_of_work(context)
+        try:
+            action_result = self.dispatch(method, request, action_args)
+            # the operation is written in the transaction of the action
+            if _is_processed_result(action_result):
+                operation_util.save_operaton(context, action_result)
+            stats = db.end_unit_of_work(context)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                db.end_unit_of_work(context, commit=False)
+                # the operation is saved with the error of the request
+                context.operation_saved = False
+                # cached items may be written by rolled back transaction
+                if context.db_items is not None:
+                    context.db_items = {}
+        LOG.debug(_("%(url)s made %(statements)d database statements "
+                    "and %(commits)d commits"),
+                  dict(stats, url=request.url))
+        return action_result
+
     def _process_stack(self, request, action, action_args,
                        content_type, body, accept):
         """Implement the processing stack."""
@@ -182,15 +215,15 @@ class GCEResource(openstack_wsgi.Resource):
 
             if action_result is None:
                 with GCEResourceExceptionHandler():
-                    action_result = self.dispatch(method, request, action_args)
+                    action_result = self._dispatch(context, method, request,
+                                                   action_args)
 
         except GCEFault as ex:
             action_result = ex.wrapped_exc
 
         response = None
         resp_obj = None
-        if (action_result is None or type(action_result) is dict or
-                isinstance(action_result, Exception)):
+        if _is_processed_result(action_result):
             action_result, result_code = self.controller.process_result(
                     request, action, action_result)
             resp_obj = GCEResponse(action_result, code=result_code)
@@ -220,4 +253,13 @@ class GCEResource(openstack_wsgi.Resource):
             msg = _("%(url)s returned a fault: %(e)s") % msg_dict
 
         LOG.info(msg)
+        context = request.environ.get('gceapi.context')
+        if context is not None:
+            db_reconciler.run_deferred(context)
         return response
+
+
+def _is_processed_result(action_result):
+    """Checks if the action result is processed by the controller."""
+    return (action_result is None or type(action_result) is dict or
+            isinstance(action_result, Exception))
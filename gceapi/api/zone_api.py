@@ -12,29 +12,98 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+
+from oslo.config import cfg
+
 from gceapi.api import base_api
+from gceapi.api import cache
 from gceapi.api import clients
 from gceapi.api import scopes
 from gceapi import exception
 
+zone_cache_opts = [
+    cfg.IntOpt('zone_cache_size',
+               default=1000,
+               help='Maximum number of projects whose availability zones '
+                    'are cached'),
+    cfg.IntOpt('zone_cache_ttl',
+               default=60,
+               help='Seconds cached availability zones of a project are '
+                    'used, 0 disables caching'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(zone_cache_opts)
+
+_zone_cache = None
+
+
+def _get_zone_cache():
+    global _zone_cache
+    if _zone_cache is None:
+        _zone_cache = cache.TTLCache(CONF.zone_cache_size,
+                                     CONF.zone_cache_ttl)
+    return _zone_cache
+
+
+def invalidate_zone_cache(project_id=None):
+    """Drops cached zones of the project or of all projects."""
+    if _zone_cache is None:
+        return
+    if project_id is None:
+        _zone_cache.clear()
+    else:
+        for is_admin in (False, True):
+            _zone_cache.pop((project_id, is_admin))
+
 
 class API(base_api.API):
-    """GCE Zones API."""
+    """GCE Zones API.
+
+    Zones of a project are cached for zone_cache_ttl seconds and are loaded
+    once per request at most. Admins and other users see different zones,
+    so their zones are cached separately.
+    """
 
     KIND = "zone"
     COMPUTE_SERVICE = "nova-compute"
+    ADMIN_ROLE = "admin"
 
     def _get_type(self):
         return self.KIND
 
     def get_item(self, context, name, scope=None):
-        zones = self.get_items(context)
-        for zone in zones:
-            if zone["name"] == name:
-                return zone
-        raise exception.NotFound
+        zone = self._get_catalog(context)["by_name"].get(name)
+        if zone is None:
+            raise exception.NotFound
+        return copy.deepcopy(zone)
 
     def get_items(self, context, scope=None):
+        return copy.deepcopy(self._get_catalog(context)["items"])
+
+    def get_items_as_scopes(self, context):
+        return [scopes.ZoneScope(zone["name"])
+                for zone in self._get_catalog(context)["items"]]
+
+    def _get_catalog(self, context):
+        return self._get_os_item(context, "zone_catalog", context.project_id,
+                                 lambda project_id: self._get_cached_catalog(
+                                     context))
+
+    def _get_cached_catalog(self, context):
+        if CONF.zone_cache_ttl <= 0:
+            return self._load_catalog(context)
+        zone_cache = _get_zone_cache()
+        # nova lists zones with hosts to admins only, and hosts filter zones
+        key = (context.project_id, self.ADMIN_ROLE in context.roles)
+        catalog = zone_cache.get(key)
+        if catalog is None:
+            catalog = self._load_catalog(context)
+            zone_cache.set(key, catalog)
+        return catalog
+
+    def _load_catalog(self, context):
         client = clients.nova(context)
         try:
             nova_zones = client.availability_zones.list()
@@ -61,8 +130,5 @@ class API(base_api.API):
                 "hosts": [host for host in zone.hosts]
                          if zone.hosts else list()
             })
-        return zones
-
-    def get_items_as_scopes(self, context):
-        return [scopes.ZoneScope(zone["name"])
-                for zone in self.get_items(context)]
+        return {"items": zones,
+                "by_name": dict((zone["name"], zone) for zone in zones)}
@@ -21,6 +21,7 @@ import sys
 
 from oslo.config import cfg
 
+from gceapi.api import operation_util
 from gceapi.db import migration
 from gceapi.openstack.common import log
 from gceapi import version
@@ -42,6 +43,14 @@ def do_db_sync():
     migration.db_sync(CONF.command.version)
 
 
+def do_operations_purge():
+    """Delete finished operations beyond retention limits."""
+    count = operation_util.purge_operations(CONF.command.max_age,
+                                            CONF.command.max_count,
+                                            CONF.command.batch_size)
+    print("%d operations deleted" % count)
+
+
 def add_command_parsers(subparsers):
     parser = subparsers.add_parser('db_version')
     parser.set_defaults(func=do_db_version)
@@ -51,6 +60,21 @@ def add_command_parsers(subparsers):
     parser.add_argument('version', nargs='?')
     parser.add_argument('current_version', nargs='?')
 
+    parser = subparsers.add_parser('operations')
+    operations_subparsers = parser.add_subparsers()
+    parser = operations_subparsers.add_parser('purge')
+    parser.set_defaults(func=do_operations_purge)
+    parser.add_argument('--max-age', type=int,
+                        help='Seconds to keep finished operations, '
+                             'operation_max_age by default')
+    parser.add_argument('--max-count', type=int,
+                        help='Number of newest finished operations to keep '
+                             'per project, operation_max_count by default')
+    parser.add_argument('--batch-size', type=int,
+                        help='Number of operations deleted in one '
+                             'transaction, operation_purge_batch_size by '
+                             'default')
+
 
 command_opt = cfg.SubCommandOpt('command',
                                 title='Commands',
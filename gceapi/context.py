@@ -90,6 +90,18 @@ class RequestContext(object):
         self.operation_start_time = None
         self.operation_get_progress_method = None
         self.operation_item_id = None
+        # the operation is written to database already
+        self.operation_saved = False
+        # OpenStack objects loaded during the request by (kind, id)
+        self.identity_map = {}
+        # GCE API database items read or written during the request by kind
+        self.db_items = {}
+        # transaction of database calls of the request if it's enabled
+        self.db_unit_of_work = None
+        # the request wrote to database, so it reads from master database
+        self.db_written = False
+        # database changes to apply after the request
+        self.db_reconcile = []
 
     def _get_read_deleted(self):
         return self._read_deleted
@@ -106,6 +118,15 @@ class RequestContext(object):
     read_deleted = property(_get_read_deleted, _set_read_deleted,
                             _del_read_deleted)
 
+    def clear_caches(self):
+        """Stops caching of objects loaded with the context.
+
+        Should be called if the context is used after the end of its request,
+        because cached objects become outdated.
+        """
+        self.identity_map = None
+        self.db_items = None
+
     def update_store(self):
         local.store.context = self
 
@@ -143,6 +164,14 @@ class RequestContext(object):
         return self.user_id
 
 
+def get_admin_context(read_deleted="no"):
+    return RequestContext(user_id=None,
+                          project_id=None,
+                          is_admin=True,
+                          read_deleted=read_deleted,
+                          overwrite=False)
+
+
 def is_user_context(context):
     """Indicates if the request context is a normal user."""
     if not context:
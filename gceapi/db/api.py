@@ -27,27 +27,86 @@ functions from gceapi.db namespace, not the gceapi.db.api namespace.
 
 """
 
+from oslo.config import cfg
+
 from gceapi.openstack.common.db import api as db_api
 
+db_opts = [
+    cfg.BoolOpt('db_request_transaction',
+                default=False,
+                help='Run all database calls of a GCE API request in one '
+                     'transaction which is committed at the end of the '
+                     'request. Not supported with sqlite_concurrent'),
+    cfg.ListOpt('db_slave_read_calls',
+                default=[],
+                help='Database read calls which are served by slave database '
+                     'if database.slave_connection is set. Supported calls '
+                     'are get_items, get_item_by_id, get_item_by_name, '
+                     'get_operations, get_operation_by_id and '
+                     'get_operation_by_name'),
+    cfg.IntOpt('db_slave_write_lag',
+               default=5,
+               help='Seconds after a write to a project during which reads '
+                    'of the project are served by master database'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(db_opts)
 
 _BACKEND_MAPPING = {'sqlalchemy': 'gceapi.db.sqlalchemy.api'}
 IMPL = db_api.DBAPI(backend_mapping=_BACKEND_MAPPING)
 
 
-def add_item(context, kind, data):
-    IMPL.add_item(context, kind, data)
+def check_config():
+    """Checks that database options can be used together.
+
+    Raises GceapiException for conflicting options.
+    """
+    IMPL.check_config()
+
+
+def begin_unit_of_work(context):
+    """Makes next database calls with the context share one transaction.
+
+    The transaction begins on first database call.
+    """
+    IMPL.begin_unit_of_work(context)
+
+
+def end_unit_of_work(context, commit=True):
+    """Commits or rolls back transaction of the context.
+
+    Returns numbers of executed statements and commits.
+    """
+    return IMPL.end_unit_of_work(context, commit)
+
+
+def add_item(context, kind, data, parent_key=None):
+    IMPL.add_item(context, kind, data, parent_key)
 
 
 def delete_item(context, kind, item_id):
     IMPL.delete_item(context, kind, item_id)
 
 
-def update_item(context, kind, item):
-    IMPL.update_item(context, kind, item)
+def update_item(context, kind, item, parent_key=None):
+    IMPL.update_item(context, kind, item, parent_key)
+
+
+def add_items(context, kind, data_list, parent_key=None):
+    IMPL.add_items(context, kind, data_list, parent_key)
+
+
+def delete_items(context, kind, item_ids):
+    IMPL.delete_items(context, kind, item_ids)
+
+
+def update_items(context, kind, items, parent_key=None):
+    IMPL.update_items(context, kind, items, parent_key)
 
 
-def get_items(context, kind):
-    return IMPL.get_items(context, kind)
+def get_items(context, kind, parent_name=None):
+    return IMPL.get_items(context, kind, parent_name)
 
 
 def get_item_by_id(context, kind, item_id):
@@ -56,3 +115,56 @@ def get_item_by_id(context, kind, item_id):
 
 def get_item_by_name(context, kind, name):
     return IMPL.get_item_by_name(context, kind, name)
+
+
+def add_operation(context, data):
+    IMPL.add_operation(context, data)
+
+
+def update_operation(context, data):
+    IMPL.update_operation(context, data)
+
+
+def delete_operation(context, operation_id):
+    IMPL.delete_operation(context, operation_id)
+
+
+def get_operation_by_id(context, operation_id):
+    return IMPL.get_operation_by_id(context, operation_id)
+
+
+def get_operation_by_name(context, name):
+    return IMPL.get_operation_by_name(context, name)
+
+
+def get_operations(context, filters=None, sort_dir="asc", limit=None,
+                   marker=None, sort_key="insert_time", marker_values=None,
+                   prefixes=None, exclude=None):
+    """Returns operations ordered by sort_key (insert_time or name).
+
+    :param filters: dict of column names (name, status, scope_type,
+                    scope_name, target_type, target_name) to a value or
+                    a list of values
+    :param limit: maximum number of operations to return
+    :param marker: id of the last operation of the previous page
+    :param marker_values: sort_key value and id of the last operation of
+                          the previous page, which doesn't have to exist
+                          in database unlike marker
+    :param prefixes: list of (column, prefix, matches) to select operations
+                     which column starts with prefix or, if matches is False,
+                     doesn't start with it
+    :param exclude: dict of column names to a value or a list of values
+                    which operations must not have
+    """
+    return IMPL.get_operations(context, filters, sort_dir, limit, marker,
+                               sort_key, marker_values, prefixes, exclude)
+
+
+def purge_operations(context, insert_time_before=None, keep_count=None,
+                     limit=500):
+    """Deletes one batch of finished operations of all projects.
+
+    Requires admin context. Returns number of deleted operations.
+    """
+    return IMPL.purge_operations(context, insert_time_before, keep_count,
+                                 limit)
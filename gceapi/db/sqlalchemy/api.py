@@ -14,22 +14,51 @@
 
 """Implementation of SQLAlchemy backend."""
 
-import ast
 import functools
 import sys
+import threading
+import time
 
 from oslo.config import cfg
+from sqlalchemy import event
+from sqlalchemy import func
 
 import gceapi.context
+from gceapi.db.sqlalchemy import codec
 from gceapi.db.sqlalchemy import models
+from gceapi.db.sqlalchemy import sqlite_profile
+from gceapi import exception
 from gceapi.openstack.common.db.sqlalchemy import session as db_session
+from gceapi.openstack.common.db.sqlalchemy import utils as db_utils
+from gceapi.openstack.common.gettextutils import _
 
 CONF = cfg.CONF
 CONF.import_opt('connection',
                 'gceapi.openstack.common.db.sqlalchemy.session',
                 group='database')
+CONF.import_opt('slave_connection',
+                'gceapi.openstack.common.db.sqlalchemy.session',
+                group='database')
+CONF.import_opt('db_slave_read_calls', 'gceapi.db.api')
+CONF.import_opt('db_slave_write_lag', 'gceapi.db.api')
+CONF.import_opt('db_request_transaction', 'gceapi.db.api')
+
+
+def get_session(slave_session=False):
+    if sqlite_profile.is_enabled():
+        return sqlite_profile.get_session(read_only=slave_session)
+    return db_session.get_session(slave_session=slave_session)
+
 
-get_session = db_session.get_session
+# Maximum number of ids in one IN clause of bulk statements
+BULK_CHUNK_SIZE = 500
+
+# Operation attributes stored in own columns
+OPERATION_COLUMNS = ("name", "status", "scope_type", "scope_name",
+                     "target_type", "target_name", "insert_time")
+OPERATION_FILTERS = ("name", "status", "scope_type", "scope_name",
+                     "target_type", "target_name")
+OPERATION_SORT_KEYS = ("insert_time", "name")
 
 
 def get_backend():
@@ -50,30 +79,172 @@ def require_context(f):
     return wrapper
 
 
+def require_admin_context(f):
+    """Decorator to require admin context.
+
+    The first argument to the wrapped function must be the context.
+    """
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not args[0].is_admin:
+            raise exception.AdminRequired()
+        return f(*args, **kwargs)
+    return wrapper
+
+
+# Time of last write by project
+_last_writes = {}
+# Time of last removal of writes older than db_slave_write_lag
+_last_prune = 0
+
+
+def _remember_write(context):
+    global _last_prune
+    context.db_written = True
+    now = time.time()
+    _last_writes[context.project_id] = now
+    # older writes don't route reads, so they are dropped once in the lag
+    if now - _last_prune >= CONF.db_slave_write_lag:
+        _last_prune = now
+        for project_id, last_write in _last_writes.items():
+            if now - last_write >= CONF.db_slave_write_lag:
+                _last_writes.pop(project_id, None)
+
+
+def write_context(f):
+    """Decorator to remember that the context wrote to database.
+
+    Next reads with the context and reads of the same project in the process
+    during db_slave_write_lag seconds are served by master database.
+    """
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _remember_write(args[0])
+    return wrapper
+
+
+class UnitOfWork(object):
+    """Transaction shared by database calls of one API request.
+
+    The transaction begins on first database call made in the thread which
+    created the unit of work. Calls from other threads use own sessions.
+    """
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.session = None
+        self.statements = 0
+        self.commits = 0
+
+    def get_session(self):
+        if self.session is None:
+            self.session = get_session()
+            self.session.begin()
+            event.listen(self.session.connection(), "before_cursor_execute",
+                         self._count_statement)
+        return self.session
+
+    def end(self, commit):
+        if self.session is None:
+            return
+        try:
+            if commit:
+                self.session.commit()
+                self.commits += 1
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+            self.session = None
+
+    def get_stats(self):
+        return {"statements": self.statements,
+                "commits": self.commits}
+
+    def _count_statement(self, *args, **kwargs):
+        self.statements += 1
+
+
+def check_config():
+    if sqlite_profile.is_enabled() and CONF.db_request_transaction:
+        # requests would queue for the only writer connection of the
+        # profile till the end of the request which holds it
+        msg = _("sqlite_concurrent can't be combined with "
+                "db_request_transaction")
+        raise exception.GceapiException(msg)
+
+
+def begin_unit_of_work(context):
+    context.db_unit_of_work = UnitOfWork()
+
+
+def end_unit_of_work(context, commit=True):
+    unit_of_work = getattr(context, "db_unit_of_work", None)
+    if unit_of_work is None:
+        return None
+    context.db_unit_of_work = None
+    unit_of_work.end(commit)
+    return unit_of_work.get_stats()
+
+
+def _get_session(context):
+    unit_of_work = getattr(context, "db_unit_of_work", None)
+    if (unit_of_work is None or
+            unit_of_work.thread is not threading.current_thread()):
+        return get_session()
+    return unit_of_work.get_session()
+
+
+def _get_read_session(context, call):
+    """Returns slave session if reads of the call may go to slave database."""
+    if sqlite_profile.is_enabled():
+        # readers see committed data, and requests don't keep transactions
+        # open with the profile
+        return get_session(slave_session=True)
+    if (not CONF.database.slave_connection or
+            call not in CONF.db_slave_read_calls or
+            getattr(context, "db_written", False)):
+        return _get_session(context)
+    last_write = _last_writes.get(context.project_id)
+    if (last_write is not None and
+            time.time() - last_write < CONF.db_slave_write_lag):
+        return _get_session(context)
+    return get_session(slave_session=True)
+
+
 def model_query(context, model, *args, **kwargs):
     """Query helper that accounts for context's `read_deleted` field.
 
     :param context: context to query under
     :param session: if present, the session to use
     """
-    session = kwargs.get('session') or get_session()
+    session = kwargs.get('session') or _get_session(context)
 
     return session.query(model, *args).\
             filter_by(project_id=context.project_id)
 
 
 @require_context
-def add_item(context, kind, data):
+@write_context
+@sqlite_profile.retry_if_locked
+def add_item(context, kind, data, parent_key=None):
     item_ref = models.Item()
     item_ref.update({
         "project_id": context.project_id,
         "kind": kind,
     })
-    item_ref.update(_pack_item_data(data))
-    item_ref.save()
+    item_ref.update(_pack_item_data(data, parent_key))
+    item_ref.save(session=_get_session(context))
 
 
 @require_context
+@write_context
+@sqlite_profile.retry_if_locked
 def delete_item(context, kind, item_id):
     model_query(context, models.Item).\
             filter_by(kind=kind,
@@ -82,26 +253,87 @@ def delete_item(context, kind, item_id):
 
 
 @require_context
-def update_item(context, kind, item):
-    item_ref = model_query(context, models.Item).\
+@write_context
+@sqlite_profile.retry_if_locked
+def update_item(context, kind, item, parent_key=None):
+    session = _get_session(context)
+    item_ref = model_query(context, models.Item, session=session).\
             filter_by(kind=kind,
                       id=item["id"]).\
-            one()
-    item_ref.update(_pack_item_data(item))
-    item_ref.save()
+            first()
+    if item_ref is None:
+        raise exception.NotFound()
+    item_ref.update(_pack_item_data(item, parent_key))
+    item_ref.save(session=session)
 
 
 @require_context
-def get_items(context, kind):
-    return [_unpack_item_data(item)
-            for item in model_query(context, models.Item).
-                    filter_by(kind=kind).
-                    all()]
+@write_context
+@sqlite_profile.retry_if_locked
+def add_items(context, kind, data_list, parent_key=None):
+    if not data_list:
+        return
+    rows = []
+    for data in data_list:
+        row = _pack_item_data(dict(data), parent_key)
+        row.update({
+            "project_id": context.project_id,
+            "kind": kind,
+        })
+        rows.append(row)
+    session = _get_session(context)
+    with session.begin(subtransactions=True):
+        session.execute(models.Item.__table__.insert(), rows)
+
+
+@require_context
+@write_context
+@sqlite_profile.retry_if_locked
+def delete_items(context, kind, item_ids):
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    session = _get_session(context)
+    with session.begin(subtransactions=True):
+        for start in xrange(0, len(item_ids), BULK_CHUNK_SIZE):
+            model_query(context, models.Item, session=session).\
+                    filter_by(kind=kind).\
+                    filter(models.Item.id.in_(
+                        item_ids[start:start + BULK_CHUNK_SIZE])).\
+                    delete(synchronize_session=False)
+
+
+@require_context
+@write_context
+@sqlite_profile.retry_if_locked
+def update_items(context, kind, items, parent_key=None):
+    if not items:
+        return
+    session = _get_session(context)
+    with session.begin(subtransactions=True):
+        for item in items:
+            values = _pack_item_data(dict(item), parent_key)
+            model_query(context, models.Item, session=session).\
+                    filter_by(kind=kind,
+                              id=values.pop("id")).\
+                    update(values, synchronize_session=False)
+
+
+@require_context
+def get_items(context, kind, parent_name=None):
+    session = _get_read_session(context, "get_items")
+    query = model_query(context, models.Item, session=session).\
+            filter_by(kind=kind)
+    if parent_name is not None:
+        query = query.filter_by(parent_name=parent_name)
+    return [_unpack_item_data(item) for item in query.all()]
 
 
 @require_context
 def get_item_by_id(context, kind, item_id):
-    return _unpack_item_data(model_query(context, models.Item).
+    session = _get_read_session(context, "get_item_by_id")
+    return _unpack_item_data(model_query(context, models.Item,
+                                         session=session).
             filter_by(kind=kind,
                       id=item_id).
             first())
@@ -109,24 +341,216 @@ def get_item_by_id(context, kind, item_id):
 
 @require_context
 def get_item_by_name(context, kind, name):
-    return _unpack_item_data(model_query(context, models.Item).
+    session = _get_read_session(context, "get_item_by_name")
+    return _unpack_item_data(model_query(context, models.Item,
+                                         session=session).
             filter_by(kind=kind,
                       name=name).
             first())
 
 
-def _pack_item_data(item_data):
+@require_context
+@write_context
+@sqlite_profile.retry_if_locked
+def add_operation(context, data):
+    operation_ref = models.Operation()
+    operation_ref.update({"project_id": context.project_id})
+    operation_ref.update(_pack_operation_data(data))
+    operation_ref.save(session=_get_session(context))
+
+
+@require_context
+@write_context
+@sqlite_profile.retry_if_locked
+def update_operation(context, data):
+    session = _get_session(context)
+    operation_ref = model_query(context, models.Operation, session=session).\
+            filter_by(id=data["id"]).\
+            one()
+    operation_ref.update(_pack_operation_data(data))
+    operation_ref.save(session=session)
+
+
+@require_context
+@write_context
+@sqlite_profile.retry_if_locked
+def delete_operation(context, operation_id):
+    model_query(context, models.Operation).\
+            filter_by(id=operation_id).\
+            delete()
+
+
+@require_context
+def get_operation_by_id(context, operation_id):
+    session = _get_read_session(context, "get_operation_by_id")
+    return _unpack_operation_data(model_query(context, models.Operation,
+                                              session=session).
+            filter_by(id=operation_id).
+            first())
+
+
+@require_context
+def get_operation_by_name(context, name):
+    session = _get_read_session(context, "get_operation_by_name")
+    return _unpack_operation_data(model_query(context, models.Operation,
+                                              session=session).
+            filter_by(name=name).
+            first())
+
+
+@require_context
+def get_operations(context, filters=None, sort_dir="asc", limit=None,
+                   marker=None, sort_key="insert_time", marker_values=None,
+                   prefixes=None, exclude=None):
+    """Returns operations ordered by sort_key.
+
+    filters maps column names to a value or a list of allowed values,
+    exclude maps them to a value or a list of values which aren't allowed.
+    prefixes is a list of (column, prefix, matches) to select operations
+    which column starts with prefix or, if matches is False, doesn't.
+    marker is id of the last operation of the previous page. marker_values
+    are sort_key value and id of that operation, so the page is found even
+    if the operation is deleted since.
+    """
+    if sort_key not in OPERATION_SORT_KEYS:
+        raise exception.InvalidInput(
+            reason=_("Operations can't be sorted by %s") % sort_key)
+    session = _get_read_session(context, "get_operations")
+    query = model_query(context, models.Operation, session=session)
+    for column, value in (filters or {}).iteritems():
+        _check_operation_filter(column)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            query = query.filter(
+                getattr(models.Operation, column).in_(list(value)))
+        else:
+            query = query.filter_by(**{column: value})
+    for column, value in (exclude or {}).iteritems():
+        _check_operation_filter(column)
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            value = [value]
+        query = query.filter(
+            ~getattr(models.Operation, column).in_(list(value)))
+    for column, prefix, matches in prefixes or []:
+        _check_operation_filter(column)
+        condition = getattr(models.Operation, column).like(
+            _escape_like(prefix) + "%", escape="\\")
+        query = query.filter(condition if matches else ~condition)
+
+    marker_ref = None
+    if marker is not None:
+        marker_ref = model_query(context, models.Operation, session=session).\
+                filter_by(id=marker).\
+                first()
+        if marker_ref is None:
+            raise exception.MarkerNotFound(marker=marker)
+    elif marker_values is not None:
+        if (not isinstance(marker_values, (list, tuple)) or
+                len(marker_values) != 2 or
+                not all(value is None or
+                        isinstance(value, (basestring, int, long, float))
+                        for value in marker_values)):
+            raise exception.InvalidInput(
+                reason=_("Invalid marker %s") % (marker_values,))
+        sort_value, marker_id = marker_values
+        marker_ref = models.Operation(id=marker_id,
+                                      **{sort_key: sort_value})
+
+    query = db_utils.paginate_query(query, models.Operation, limit,
+                                    [sort_key, "id"], marker=marker_ref,
+                                    sort_dir=sort_dir)
+    return [_unpack_operation_data(operation) for operation in query.all()]
+
+
+def _check_operation_filter(column):
+    if column not in OPERATION_FILTERS:
+        raise exception.InvalidInput(
+            reason=_("Operations can't be filtered by %s") % column)
+
+
+def _escape_like(value):
+    return (value.replace("\\", "\\\\").
+            replace("%", "\\%").
+            replace("_", "\\_"))
+
+
+@require_admin_context
+@sqlite_profile.retry_if_locked
+def purge_operations(context, insert_time_before=None, keep_count=None,
+                     limit=BULK_CHUNK_SIZE):
+    """Deletes up to limit finished operations of all projects.
+
+    Operations inserted before insert_time_before and operations beyond
+    keep_count newest finished operations of their project are deleted.
+    Returns number of deleted operations.
+    """
+    session = _get_session(context)
+    done_query = session.query(models.Operation.id).filter_by(status="DONE")
+    operation_ids = []
+    if insert_time_before is not None:
+        operation_ids.extend(operation_id for operation_id, in done_query.
+                filter(models.Operation.insert_time < insert_time_before).
+                limit(limit))
+    if keep_count is not None:
+        projects = session.query(models.Operation.project_id).\
+                filter_by(status="DONE").\
+                group_by(models.Operation.project_id).\
+                having(func.count(models.Operation.id) > keep_count)
+        for project_id, in projects:
+            if len(operation_ids) >= limit:
+                break
+            operation_ids.extend(operation_id for operation_id, in done_query.
+                    filter_by(project_id=project_id).
+                    order_by(models.Operation.insert_time.desc(),
+                             models.Operation.id.desc()).
+                    offset(keep_count).
+                    limit(limit - len(operation_ids)))
+    operation_ids = list(set(operation_ids))
+    if not operation_ids:
+        return 0
+    with session.begin(subtransactions=True):
+        session.query(models.Operation).\
+                filter(models.Operation.id.in_(operation_ids)).\
+                delete(synchronize_session=False)
+    return len(operation_ids)
+
+
+def _pack_operation_data(operation_data):
+    operation_data = dict(operation_data)
+    values = dict((column, operation_data.pop(column, None))
+                  for column in OPERATION_COLUMNS)
+    values["id"] = operation_data.pop("id")
+    values["data"] = codec.encode(operation_data)
+    return values
+
+
+def _unpack_operation_data(operation_ref):
+    if operation_ref is None:
+        return None
+    data = codec.decode(operation_ref.data)
+    data["id"] = operation_ref.id
+    for column in OPERATION_COLUMNS:
+        value = getattr(operation_ref, column)
+        if value is not None:
+            data[column] = value
+    return data
+
+
+def _pack_item_data(item_data, parent_key=None):
+    # parent attribute is kept in data too, so items are unpacked without
+    # knowing which attribute is the parent one
     return {
         "id": item_data.pop("id"),
         "name": item_data.pop("name", None),
-        "data": str(item_data),
+        "parent_name": (item_data.get(parent_key)
+                        if parent_key is not None else None),
+        "data": codec.encode(item_data),
     }
 
 
 def _unpack_item_data(item_ref):
     if item_ref is None:
         return None
-    data = ast.literal_eval(item_ref.data)
+    data = codec.decode(item_ref.data)
     data["id"] = item_ref.id
     if item_ref.name is not None:
         data["name"] = item_ref.name
@@ -0,0 +1,94 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Encoding of item payloads stored in data column of items table.
+
+Encoded payload starts with a prefix of its format:
+  j1: - JSON
+  z1: - JSON compressed with zlib and encoded with base64
+Payloads without a prefix were written by earlier versions as Python
+literals. They are still read but never written.
+"""
+
+import ast
+import base64
+import json
+import zlib
+
+from oslo.config import cfg
+
+from gceapi.openstack.common.gettextutils import _
+
+codec_opts = [
+    cfg.StrOpt('db_item_format',
+               default='json',
+               help='Format of item payloads written to database: json or '
+                    'zjson (compressed json)'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(codec_opts)
+
+JSON_PREFIX = "j1:"
+ZJSON_PREFIX = "z1:"
+PREFIX_LENGTH = 3
+
+
+def _encode_json(data):
+    return JSON_PREFIX + json.dumps(data, separators=(",", ":"))
+
+
+def _encode_zjson(data):
+    return ZJSON_PREFIX + base64.b64encode(
+        zlib.compress(json.dumps(data, separators=(",", ":"))))
+
+
+def _decode_json(text):
+    return json.loads(text[PREFIX_LENGTH:])
+
+
+def _decode_zjson(text):
+    return json.loads(zlib.decompress(base64.b64decode(text[PREFIX_LENGTH:])))
+
+
+_ENCODERS = {
+    "json": _encode_json,
+    "zjson": _encode_zjson,
+}
+
+_DECODERS = {
+    JSON_PREFIX: _decode_json,
+    ZJSON_PREFIX: _decode_zjson,
+}
+
+
+def encode(data, item_format=None):
+    """Encodes item payload to string in configured or given format."""
+    encoder = _ENCODERS.get(item_format or CONF.db_item_format)
+    if encoder is None:
+        raise ValueError(_("Unknown item format: %s") %
+                         (item_format or CONF.db_item_format))
+    return encoder(data)
+
+
+def decode(text):
+    """Decodes item payload written in any supported format."""
+    decoder = _DECODERS.get(text[:PREFIX_LENGTH])
+    if decoder is None:
+        return ast.literal_eval(text)
+    return decoder(text)
+
+
+def is_legacy(text):
+    return text[:PREFIX_LENGTH] not in _DECODERS
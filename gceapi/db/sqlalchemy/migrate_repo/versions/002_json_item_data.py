@@ -0,0 +1,79 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Converts item payloads from Python literals to JSON.
+
+The migration doesn't use gceapi.db.sqlalchemy.codec to stay valid when the
+codec changes, but it writes payloads in the same 'j1:' format.
+"""
+
+import ast
+import base64
+import json
+import zlib
+
+from sqlalchemy import and_, MetaData, select, Table
+
+JSON_PREFIX = "j1:"
+ZJSON_PREFIX = "z1:"
+BATCH_SIZE = 1000
+
+
+def _convert(migrate_engine, convert):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    items = Table('items', meta, autoload=True)
+
+    rows = migrate_engine.execute(
+        select([items.c.kind, items.c.id, items.c.data])).fetchall()
+    connection = migrate_engine.connect()
+    try:
+        for start in xrange(0, len(rows), BATCH_SIZE):
+            transaction = connection.begin()
+            for kind, item_id, data in rows[start:start + BATCH_SIZE]:
+                new_data = convert(data)
+                if new_data is None:
+                    continue
+                connection.execute(
+                    items.update().
+                    where(and_(items.c.kind == kind, items.c.id == item_id)).
+                    values(data=new_data))
+            transaction.commit()
+    finally:
+        connection.close()
+
+
+def _to_json(data):
+    if data is None or data[:3] in (JSON_PREFIX, ZJSON_PREFIX):
+        return None
+    return JSON_PREFIX + json.dumps(ast.literal_eval(data),
+                                    separators=(",", ":"))
+
+
+def _to_literal(data):
+    if data is None:
+        return None
+    if data.startswith(JSON_PREFIX):
+        return str(json.loads(data[3:]))
+    if data.startswith(ZJSON_PREFIX):
+        return str(json.loads(zlib.decompress(base64.b64decode(data[3:]))))
+    return None
+
+
+def upgrade(migrate_engine):
+    _convert(migrate_engine, _to_json)
+
+
+def downgrade(migrate_engine):
+    _convert(migrate_engine, _to_literal)
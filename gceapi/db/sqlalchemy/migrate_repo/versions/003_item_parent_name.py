@@ -0,0 +1,81 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Adds indexed parent_name column to items table.
+
+Fills it for existing items of kinds which are looked up by parent.
+"""
+
+import ast
+import base64
+import json
+import zlib
+
+from sqlalchemy import and_, Column, Index, MetaData, select, String, Table
+
+# attributes stored in parent_name column by kinds
+PARENT_KEYS = {
+    "access_config": "instance_name",
+    "attached_disk": "instance_name",
+}
+
+
+def _decode(data):
+    if data.startswith("j1:"):
+        return json.loads(data[3:])
+    if data.startswith("z1:"):
+        return json.loads(zlib.decompress(base64.b64decode(data[3:])))
+    return ast.literal_eval(data)
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    items = Table('items', meta, autoload=True)
+
+    parent_name = Column("parent_name", String(length=63))
+    parent_name.create(items)
+    Index('items_project_kind_parent_name_idx',
+          items.c.project_id, items.c.kind, items.c.parent_name,
+          items.c.name).create(migrate_engine)
+
+    for kind, parent_key in PARENT_KEYS.iteritems():
+        rows = migrate_engine.execute(
+            select([items.c.id, items.c.data]).
+            where(items.c.kind == kind)).fetchall()
+        for item_id, data in rows:
+            value = _decode(data).get(parent_key)
+            if value is None:
+                continue
+            migrate_engine.execute(
+                items.update().
+                where(and_(items.c.kind == kind, items.c.id == item_id)).
+                values(parent_name=value))
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    items = Table('items', meta, autoload=True)
+
+    Index('items_project_kind_parent_name_idx',
+          items.c.project_id, items.c.kind, items.c.parent_name,
+          items.c.name).drop(migrate_engine)
+
+    # reload the table without the index, because sqlite recreates the table
+    # with all known indexes to drop the column
+    meta = MetaData()
+    meta.bind = migrate_engine
+    items = Table('items', meta, autoload=True)
+    items.c.parent_name.drop()
@@ -0,0 +1,138 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Moves operations from items table to own operations table.
+
+Columns which operations are filtered and ordered by are taken out of the
+payload, the rest of the payload is kept in 'j1:' format.
+"""
+
+import ast
+import base64
+import json
+import zlib
+
+from sqlalchemy import and_, Column, Index, MetaData, PrimaryKeyConstraint
+from sqlalchemy import select, String, Table, Text
+
+JSON_PREFIX = "j1:"
+BATCH_SIZE = 1000
+COLUMNS = ["status", "scope_type", "scope_name",
+           "target_type", "target_name", "insert_time"]
+
+
+def _decode(data):
+    if data.startswith("j1:"):
+        return json.loads(data[3:])
+    if data.startswith("z1:"):
+        return json.loads(zlib.decompress(base64.b64decode(data[3:])))
+    return ast.literal_eval(data)
+
+
+def _encode(data):
+    return JSON_PREFIX + json.dumps(data, separators=(",", ":"))
+
+
+def _copy_rows(migrate_engine, rows, table, delete):
+    connection = migrate_engine.connect()
+    try:
+        for start in xrange(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            transaction = connection.begin()
+            connection.execute(table.insert(), batch)
+            delete(connection, [row["id"] for row in batch])
+            transaction.commit()
+    finally:
+        connection.close()
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    items = Table('items', meta, autoload=True)
+
+    operations = Table('operations', meta,
+        Column("id", String(length=255)),
+        Column("project_id", String(length=255)),
+        Column("name", String(length=63)),
+        Column("status", String(length=20)),
+        Column("scope_type", String(length=20)),
+        Column("scope_name", String(length=63)),
+        Column("target_type", String(length=50)),
+        Column("target_name", String(length=63)),
+        Column("insert_time", String(length=40)),
+        Column("data", Text()),
+        PrimaryKeyConstraint('id'),
+        Index('operations_project_name_idx', 'project_id', 'name'),
+        Index('operations_project_scope_idx',
+              'project_id', 'scope_type', 'scope_name', 'insert_time'),
+        Index('operations_project_status_idx', 'project_id', 'status'),
+        Index('operations_project_target_idx',
+              'project_id', 'target_type', 'target_name'),
+        Index('operations_project_insert_time_idx',
+              'project_id', 'insert_time'),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8"
+    )
+    operations.create()
+
+    rows = []
+    for item_id, project_id, name, data in migrate_engine.execute(
+            select([items.c.id, items.c.project_id, items.c.name,
+                    items.c.data]).
+            where(items.c.kind == "operation")).fetchall():
+        data = _decode(data)
+        row = dict((column, data.pop(column, None)) for column in COLUMNS)
+        row.update({
+            "id": item_id,
+            "project_id": project_id,
+            "name": name,
+            "data": _encode(data),
+        })
+        rows.append(row)
+
+    def delete(connection, ids):
+        connection.execute(items.delete().where(
+            and_(items.c.kind == "operation", items.c.id.in_(ids))))
+
+    _copy_rows(migrate_engine, rows, operations, delete)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    items = Table('items', meta, autoload=True)
+    operations = Table('operations', meta, autoload=True)
+
+    rows = []
+    for row in migrate_engine.execute(select([operations])).fetchall():
+        data = _decode(row["data"])
+        for column in COLUMNS:
+            if row[column] is not None:
+                data[column] = row[column]
+        rows.append({
+            "id": row["id"],
+            "project_id": row["project_id"],
+            "kind": "operation",
+            "name": row["name"],
+            "parent_name": None,
+            "data": _encode(data),
+        })
+
+    def delete(connection, ids):
+        connection.execute(operations.delete().where(
+            operations.c.id.in_(ids)))
+
+    _copy_rows(migrate_engine, rows, items, delete)
+    operations.drop()
@@ -29,9 +29,37 @@ class Item(BASE, models.ModelBase):
     __table_args__ = (
         PrimaryKeyConstraint('kind', 'id'),
         Index('items_project_kind_name_idx', 'project_id', 'kind', 'name'),
+        Index('items_project_kind_parent_name_idx',
+              'project_id', 'kind', 'parent_name', 'name'),
     )
     id = Column(String(length=255))
     project_id = Column(String(length=255))
     kind = Column(String(length=50))
     name = Column(String(length=63))
+    parent_name = Column(String(length=63))
+    data = Column(Text())
+
+
+class Operation(BASE, models.ModelBase):
+    __tablename__ = 'operations'
+    __table_args__ = (
+        PrimaryKeyConstraint('id'),
+        Index('operations_project_name_idx', 'project_id', 'name'),
+        Index('operations_project_scope_idx',
+              'project_id', 'scope_type', 'scope_name', 'insert_time'),
+        Index('operations_project_status_idx', 'project_id', 'status'),
+        Index('operations_project_target_idx',
+              'project_id', 'target_type', 'target_name'),
+        Index('operations_project_insert_time_idx',
+              'project_id', 'insert_time'),
+    )
+    id = Column(String(length=255))
+    project_id = Column(String(length=255))
+    name = Column(String(length=63))
+    status = Column(String(length=20))
+    scope_type = Column(String(length=20))
+    scope_name = Column(String(length=63))
+    target_type = Column(String(length=50))
+    target_name = Column(String(length=63))
+    insert_time = Column(String(length=40))
     data = Column(Text())
@@ -0,0 +1,178 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""SQLite database profile for concurrent requests.
+
+The database file is switched to WAL journal, where readers don't block
+the writer and the writer doesn't block readers. Writes go through one
+pooled writer connection, so they queue in the process instead of failing
+on the file lock, reads use a pool of read-only connections. Writes which
+still find the database locked by another process are retried.
+"""
+
+import functools
+import threading
+import time
+
+from oslo.config import cfg
+import sqlalchemy
+from sqlalchemy import pool
+
+from gceapi.openstack.common.db.sqlalchemy import session as db_session
+from gceapi.openstack.common.gettextutils import _
+from gceapi.openstack.common import log as logging
+
+sqlite_profile_opts = [
+    cfg.BoolOpt('sqlite_concurrent',
+                default=False,
+                help='Tune file SQLite database for concurrent requests: '
+                     'WAL journal, one writer connection and a pool of '
+                     'reader connections. Can\'t be combined with '
+                     'db_request_transaction, which would hold the writer '
+                     'connection for whole requests'),
+    cfg.IntOpt('sqlite_busy_timeout',
+               default=5000,
+               help='Milliseconds a SQLite connection waits for a locked '
+                    'database'),
+    cfg.IntOpt('sqlite_busy_retries',
+               default=3,
+               help='Number of retries of a write which found SQLite '
+                    'database locked'),
+    cfg.IntOpt('sqlite_cache_size',
+               default=8192,
+               help='Page cache size of a SQLite connection in KiB'),
+    cfg.IntOpt('sqlite_reader_pool_size',
+               default=10,
+               help='Number of SQLite reader connections'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(sqlite_profile_opts)
+CONF.import_opt('connection',
+                'gceapi.openstack.common.db.sqlalchemy.session',
+                group='database')
+
+LOG = logging.getLogger(__name__)
+
+# Seconds to wait before the first retry of a locked write, doubled for
+# next retries
+RETRY_DELAY = 0.05
+
+_writer_maker = None
+_reader_maker = None
+_makers_lock = threading.Lock()
+
+
+def is_enabled():
+    """Checks that the profile is on and the database is a SQLite file."""
+    if not CONF.sqlite_concurrent:
+        return False
+    url = sqlalchemy.engine.url.make_url(CONF.database.connection)
+    return (url.drivername.startswith("sqlite") and
+            url.database not in (None, "", ":memory:"))
+
+
+def get_session(read_only=False):
+    """Returns session of the writer or a reader connection."""
+    global _writer_maker, _reader_maker
+    _makers_lock.acquire()
+    try:
+        if _writer_maker is None:
+            # the writer connects first to switch the file to WAL journal
+            writer = _create_engine(1, False)
+            writer.connect().close()
+            reader = _create_engine(CONF.sqlite_reader_pool_size, True)
+            _writer_maker = db_session.get_maker(writer)
+            _reader_maker = db_session.get_maker(reader)
+    finally:
+        _makers_lock.release()
+    maker = _reader_maker if read_only else _writer_maker
+    return maker()
+
+
+def cleanup():
+    """Closes connections of the profile."""
+    global _writer_maker, _reader_maker
+    _makers_lock.acquire()
+    try:
+        for maker in (_writer_maker, _reader_maker):
+            if maker is not None:
+                maker.close_all()
+                maker.kw["bind"].dispose()
+        _writer_maker = None
+        _reader_maker = None
+    finally:
+        _makers_lock.release()
+
+
+def retry_if_locked(f):
+    """Decorator to retry a write which found the database locked."""
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        retries = CONF.sqlite_busy_retries if is_enabled() else 0
+        delay = RETRY_DELAY
+        while True:
+            try:
+                return f(*args, **kwargs)
+            except Exception as ex:
+                if retries <= 0 or not _is_locked_error(ex):
+                    raise
+            LOG.warning(_("SQLite database is locked, retrying %s"),
+                        f.__name__)
+            time.sleep(delay)
+            retries -= 1
+            delay *= 2
+    return wrapper
+
+
+def _is_locked_error(ex):
+    return "database is locked" in unicode(ex)
+
+
+def _create_engine(pool_size, read_only):
+    engine = sqlalchemy.create_engine(
+        CONF.database.connection,
+        poolclass=pool.QueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        convert_unicode=True,
+        connect_args={"timeout": CONF.sqlite_busy_timeout / 1000.0,
+                      "check_same_thread": False})
+    sqlalchemy.event.listen(engine, "connect",
+                            functools.partial(_set_pragmas,
+                                              read_only=read_only))
+    sqlalchemy.event.listen(engine, "checkin", _thread_yield)
+    return engine
+
+
+def _set_pragmas(dbapi_conn, connection_rec, read_only):
+    cursor = dbapi_conn.cursor()
+    try:
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode = WAL")
+        # WAL journal keeps the database consistent with NORMAL
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute("PRAGMA cache_size = -%d" % CONF.sqlite_cache_size)
+        cursor.execute("PRAGMA busy_timeout = %d" % CONF.sqlite_busy_timeout)
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+
+def _thread_yield(dbapi_conn, connection_rec):
+    # let other green threads use the connection
+    time.sleep(0)
@@ -23,6 +23,10 @@ from novaclient import client as novaclient
 from novaclient import shell as novashell
 
 import gceapi.api
+from gceapi.api import clients
+from gceapi.api import db_reconciler
+from gceapi.api import machine_type_api
+from gceapi.api import zone_api
 from gceapi.openstack.common import timeutils
 from gceapi import test
 from gceapi.tests.api import fake_cinder_client
@@ -104,6 +108,18 @@ class GCEControllerTest(test.TestCase):
         self.stubs.Set(novashell.OpenStackComputeShell, '_discover_extensions',
                        fake_nova_client.fake_discover_extensions)
         self.stubs.Set(novaclient, 'Client', fake_nova_client.FakeNovaClient)
+        clients.clear_client_pool()
+        clients.clear_service_catalog_cache()
+        machine_type_api.invalidate_flavor_cache()
+        zone_api.invalidate_zone_cache()
+        self.addCleanup(clients.clear_client_pool)
+        self.addCleanup(clients.clear_service_catalog_cache)
+        self.addCleanup(machine_type_api.invalidate_flavor_cache)
+        self.addCleanup(zone_api.invalidate_zone_cache)
+        # deferred database changes are applied before the response returns
+        self.stubs.Set(db_reconciler, "_spawn",
+                       lambda func, *args: func(*args))
+        self.addCleanup(db_reconciler.reset)
         self.db_fixture = self.useFixture(fake_db.DBFixture(self.stubs))
         self.stubs.Set(
                 uuid, "uuid4",
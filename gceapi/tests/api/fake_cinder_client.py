@@ -218,6 +218,8 @@ class FakeVolumes(object):
             if "display_name" in search_opts:
                 result = [d for d in result
                     if d.display_name == search_opts["display_name"]]
+            if "offset" in search_opts:
+                result = result[search_opts["offset"]:]
         return result
 
     def get(self, disk):
@@ -16,6 +16,7 @@ import copy
 import fixtures
 
 from gceapi import db
+from gceapi import exception
 
 
 ITEMS = [
@@ -267,22 +268,41 @@ ITEMS = [
 ]
 
 
+# attributes stored in parent_name column of items of these kinds
+PARENT_KEYS = {
+    "access_config": "instance_name",
+    "attached_disk": "instance_name",
+}
+
+
 class DBFixture(fixtures.Fixture):
     def __init__(self, stubs):
         super(DBFixture, self).__init__()
         self.stubs = stubs
-        self.items = copy.copy(ITEMS)
+        self.items = copy.deepcopy(ITEMS)
 
     def setUp(self):
         super(DBFixture, self).setUp()
         self.stubs.Set(db, "add_item", self.fake_add_item)
         self.stubs.Set(db, "update_item", self.fake_update_item)
         self.stubs.Set(db, "delete_item", self.fake_delete_item)
+        self.stubs.Set(db, "add_items", self.fake_add_items)
+        self.stubs.Set(db, "update_items", self.fake_update_items)
+        self.stubs.Set(db, "delete_items", self.fake_delete_items)
         self.stubs.Set(db, "get_items", self.fake_get_items)
         self.stubs.Set(db, "get_item_by_id", self.fake_get_item_by_id)
         self.stubs.Set(db, "get_item_by_name", self.fake_get_item_by_name)
+        self.stubs.Set(db, "add_operation", self.fake_add_operation)
+        self.stubs.Set(db, "update_operation", self.fake_update_operation)
+        self.stubs.Set(db, "delete_operation", self.fake_delete_operation)
+        self.stubs.Set(db, "get_operation_by_id",
+                       self.fake_get_operation_by_id)
+        self.stubs.Set(db, "get_operation_by_name",
+                       self.fake_get_operation_by_name)
+        self.stubs.Set(db, "get_operations", self.fake_get_operations)
 
-    def fake_add_item(self, context, kind, data):
+    def fake_add_item(self, context, kind, data, parent_key=None):
+        self._check_parent_key(kind, parent_key)
         if any(item["kind"] == kind and item["id"] == data["id"] and
                (data.get("name") is None or
                 item.get("name") == data.get("name") and data.get)
@@ -293,19 +313,41 @@ class DBFixture(fixtures.Fixture):
         self.items.append(item)
         return data
 
-    def fake_update_item(self, context, kind, item_data):
+    def fake_update_item(self, context, kind, item_data, parent_key=None):
+        self._check_parent_key(kind, parent_key)
         db_item = next((item for item in self.items
                         if (item["kind"] == kind and
-                            item["id"] == item_data["id"])))
+                            item["id"] == item_data["id"])), None)
+        if db_item is None:
+            raise exception.NotFound()
         db_item.update(item_data)
 
     def fake_delete_item(self, context, kind, item_id):
         self.items = [item for item in self.items
-                      if item["kind"] == kind and item["id"] == item_id]
+                      if item["kind"] != kind or item["id"] != item_id]
+
+    def fake_add_items(self, context, kind, data_list, parent_key=None):
+        for data in data_list:
+            self.fake_add_item(context, kind, data, parent_key)
+
+    def fake_update_items(self, context, kind, items, parent_key=None):
+        for item in items:
+            self.fake_update_item(context, kind, item, parent_key)
+
+    def fake_delete_items(self, context, kind, item_ids):
+        item_ids = set(item_ids)
+        self.items = [item for item in self.items
+                      if item["kind"] != kind or item["id"] not in item_ids]
+
+    def _check_parent_key(self, kind, parent_key):
+        if parent_key != PARENT_KEYS.get(kind):
+            raise Exception("Wrong parent key %s of %s" % (parent_key, kind))
 
-    def fake_get_items(self, context, kind):
+    def fake_get_items(self, context, kind, parent_name=None):
+        parent_key = PARENT_KEYS.get(kind)
         return [copy.copy(item) for item in self.items
-                if item["kind"] == kind]
+                if item["kind"] == kind and
+                (parent_name is None or item[parent_key] == parent_name)]
 
     def fake_get_item_by_id(self, context, kind, item_id):
         return next((copy.copy(item) for item in self.items
@@ -314,3 +356,48 @@ class DBFixture(fixtures.Fixture):
     def fake_get_item_by_name(self, context, kind, name):
         return next((copy.copy(item) for item in self.items
                      if item["kind"] == kind and item["name"] == name), None)
+
+    def fake_add_operation(self, context, data):
+        self.fake_add_item(context, "operation", data)
+
+    def fake_update_operation(self, context, data):
+        self.fake_update_item(context, "operation", data)
+
+    def fake_delete_operation(self, context, operation_id):
+        self.fake_delete_item(context, "operation", operation_id)
+
+    def fake_get_operation_by_id(self, context, operation_id):
+        return self.fake_get_item_by_id(context, "operation", operation_id)
+
+    def fake_get_operation_by_name(self, context, name):
+        return self.fake_get_item_by_name(context, "operation", name)
+
+    def fake_get_operations(self, context, filters=None, sort_dir="asc",
+                            limit=None, marker=None, sort_key="insert_time",
+                            marker_values=None, prefixes=None,
+                            exclude=None):
+        operations = self.fake_get_items(context, "operation")
+        for column, value in (filters or {}).iteritems():
+            values = value if isinstance(value, list) else [value]
+            operations = [operation for operation in operations
+                          if operation.get(column) in values]
+        for column, value in (exclude or {}).iteritems():
+            values = value if isinstance(value, list) else [value]
+            operations = [operation for operation in operations
+                          if operation.get(column) not in values]
+        for column, prefix, matches in prefixes or []:
+            operations = [operation for operation in operations
+                          if (operation.get(column) or "").startswith(prefix)
+                          == matches]
+        operations.sort(key=lambda operation: (operation[sort_key],
+                                               operation["id"]),
+                        reverse=(sort_dir == "desc"))
+        if marker is not None:
+            ids = [operation["id"] for operation in operations]
+            operations = operations[ids.index(marker) + 1:]
+        elif marker_values is not None:
+            marker_key = tuple(marker_values)
+            operations = [operation for operation in operations
+                          if ((operation[sort_key], operation["id"]) >
+                              marker_key) == (sort_dir != "desc")]
+        return operations[:limit]
@@ -102,7 +102,15 @@ class FakeImages(object):
             return [i for i in FAKE_IMAGES
                     if i.name == filters["name"]]
 
-        return FAKE_IMAGES
+        result = FAKE_IMAGES
+        if kwargs.get('sort_key') is not None:
+            result = sorted(result,
+                            key=lambda i: getattr(i, kwargs['sort_key']),
+                            reverse=(kwargs.get('sort_dir') == 'desc'))
+        if kwargs.get('marker') is not None:
+            ids = [i.id for i in result]
+            result = result[ids.index(kwargs['marker']) + 1:]
+        return result[:kwargs.get('limit')]
 
     def delete(self, image):
         image_id = utils.get_id(image)
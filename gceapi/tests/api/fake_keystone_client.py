@@ -36,3 +36,8 @@ class FakeKeystoneClient(object):
     @property
     def tenants(self):
         return FakeTenants()
+
+    @property
+    def service_catalog(self):
+        return utils.FakeObject({"catalog": {
+            "serviceCatalog": fake_request.FAKE_SERVICE_CATALOG}})
@@ -163,10 +163,22 @@ class FakeNeutronClient(object):
     def __init__(self, **kwargs):
         pass
 
-    def list_networks(self, **search_opts):
+    def list_networks(self, retrieve_all=True, **search_opts):
+        sort_key = search_opts.pop("sort_key", None)
+        sort_dir = search_opts.pop("sort_dir", "asc")
+        limit = search_opts.pop("limit", None)
+        marker = search_opts.pop("marker", None)
         networks = [copy.deepcopy(r) for r in FAKE_NETWORKS["networks"]
                     if all(r.get(a) == search_opts[a] for a in search_opts)]
-        return {"networks": networks}
+        if sort_key is not None:
+            networks.sort(key=lambda r: r[sort_key],
+                          reverse=(sort_dir == "desc"))
+        if marker is not None:
+            ids = [r["id"] for r in networks]
+            networks = networks[ids.index(marker) + 1:]
+        if retrieve_all:
+            return {"networks": networks}
+        return iter([{"networks": networks[:limit]}])
 
     def show_subnet(self, subnet_id):
         for subnet in FAKE_SUBNETS:
@@ -626,7 +626,10 @@ class FakeServers(object):
 
             result = filtered
 
-        return result
+        if marker is not None:
+            ids = [i.id for i in result]
+            result = result[ids.index(marker) + 1:]
+        return result[:limit]
 
     def create(self, name, image, flavor, meta=None, files=None,
                reservation_id=None, min_count=None,
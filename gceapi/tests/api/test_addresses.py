@@ -12,7 +12,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+
 from gceapi.api import addresses
+from gceapi.api import db_reconciler
 from gceapi.tests.api import common
 
 EXPECTED_ADDRESSES = [{
@@ -145,3 +148,24 @@ class AddressesTest(common.GCEControllerTest):
         }
         expected.update(common.COMMON_REGION_FINISHED_OPERATION)
         self.assertDictEqual(expected, response.json_body)
+
+    def test_list_is_read_only(self):
+        spawned = []
+        self.stubs.Set(db_reconciler, "_spawn",
+                       lambda func, *args: spawned.append((func, args)))
+        db_items = copy.deepcopy(self.db_fixture.items)
+
+        response = self.request_gce("/fake_project/regions/nova/addresses")
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(db_items, self.db_fixture.items)
+        self.assertEqual(1, len(spawned))
+
+        # reconciliation of the kind is postponed for a while
+        response = self.request_gce("/fake_project/regions/nova/addresses")
+        self.assertEqual(1, len(spawned))
+
+        func, args = spawned[0]
+        func(*args)
+        self.assertIn("address-172-24-4-227",
+                      [item.get("name") for item in self.db_fixture.items
+                       if item["kind"] == "address"])
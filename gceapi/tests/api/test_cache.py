@@ -0,0 +1,57 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from gceapi.api import cache
+from gceapi import test
+
+
+class TTLCacheTest(test.TestCase):
+
+    def setUp(self):
+        super(TTLCacheTest, self).setUp()
+        self.now = 1000.0
+        self.stubs.Set(time, "time", lambda: self.now)
+
+    def test_lru_eviction(self):
+        lru = cache.TTLCache(2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        self.assertEqual(1, lru.get("a"))
+        lru.set("c", 3)
+        self.assertEqual(1, lru.get("a"))
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(3, lru.get("c"))
+        self.assertEqual(2, len(lru))
+
+    def test_expiration(self):
+        lru = cache.TTLCache(10, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2, ttl=10)
+        self.now += 30
+        self.assertEqual(1, lru.get("a"))
+        self.assertIsNone(lru.get("b"))
+        self.now += 30
+        self.assertEqual("default", lru.get("a", "default"))
+
+    def test_purge_expired(self):
+        lru = cache.TTLCache(10, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2, ttl=120)
+        self.now += 90
+        self.assertEqual(1, lru.purge_expired())
+        self.assertEqual(1, len(lru))
+        self.assertEqual(2, lru.pop("b"))
+        self.assertEqual(0, len(lru))
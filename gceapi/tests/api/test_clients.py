@@ -0,0 +1,88 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from cinderclient import client as cinderclient
+
+from gceapi.api import clients
+from gceapi import context
+from gceapi.tests.api import common
+from gceapi.tests.api import fake_cinder_client
+from gceapi.tests.api import fake_request
+
+
+class ClientsTest(common.GCEControllerTest):
+
+    def _get_context(self, auth_token="fake_token"):
+        ctx = context.RequestContext("fake_user", fake_request.PROJECT_ID,
+                                     auth_token=auth_token,
+                                     overwrite=False)
+        ctx.service_catalog = fake_request.FAKE_SERVICE_CATALOG
+        return ctx
+
+    def test_clients_are_reused_for_same_token(self):
+        created = []
+
+        def fake_client(version, *args, **kwargs):
+            client = fake_cinder_client.FakeCinderClient(version)
+            created.append(client)
+            return client
+
+        self.stubs.Set(cinderclient, "Client", fake_client)
+        first = clients.cinder(self._get_context())
+        second = clients.cinder(self._get_context())
+        self.assertIs(first, second)
+        self.assertEqual(1, len(created))
+
+        other = clients.cinder(self._get_context("other_token"))
+        self.assertIsNot(first, other)
+        self.assertEqual(2, len(created))
+
+    def test_clients_are_keyed_by_service(self):
+        ctx = self._get_context()
+        self.assertIsNot(clients.cinder(ctx), clients.glance(ctx))
+        self.assertIs(clients.glance(ctx), clients.glance(ctx))
+
+    def test_nova_extensions_are_discovered_once(self):
+        calls = []
+
+        def fake_discover_extensions(shell, version):
+            calls.append(version)
+            return []
+
+        self.stubs.Set(clients.novashell.OpenStackComputeShell,
+                       "_discover_extensions", fake_discover_extensions)
+        self.stubs.Set(clients, "_nova_extensions", None)
+        clients.nova(self._get_context())
+        clients.nova(self._get_context("other_token"))
+        clients.discover_nova_extensions()
+        self.assertEqual(["1.1"], calls)
+
+    def test_service_catalog_is_cached_per_project(self):
+        catalog_requests = []
+        keystone = clients.keystone
+
+        def fake_keystone(ctx):
+            catalog_requests.append(ctx.project_id)
+            return keystone(ctx)
+
+        self.stubs.Set(clients, "keystone", fake_keystone)
+        for token in ("fake_token", "other_token"):
+            ctx = self._get_context(token)
+            ctx.service_catalog = None
+            self.assertEqual("http://192.168.137.21:9292",
+                             clients._url_for(ctx, service_type="image"))
+        self.assertEqual([fake_request.PROJECT_ID], catalog_requests)
+        stats = clients.get_service_catalog_cache_stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
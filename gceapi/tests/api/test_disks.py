@@ -14,7 +14,10 @@
 
 import copy
 
+from gceapi.api import disk_api
 from gceapi.tests.api import common
+from gceapi.tests.api import fake_cinder_client
+from gceapi.tests.api import fake_request
 
 
 EXPECTED_DISK_1 = {
@@ -250,6 +253,15 @@ class DisksControllerTest(common.GCEControllerTest):
         self.assertEqual(200, response.status_int)
         self.assertDictEqual(expected, response.json_body)
 
+    def test_delete_disk_forgets_loaded_volume(self):
+        self.stubs.Set(fake_cinder_client.FakeVolumes, "delete",
+                       lambda self, volume: None)
+        context = fake_request.HTTPRequest.blank("/").environ["gceapi.context"]
+        key = ("volume", "e922ebbb-2938-4a12-869f-cbc4e26c6600")
+        context.identity_map[key] = object()
+        disk_api.API().delete_item(context, "fake-disk-1")
+        self.assertNotIn(key, context.identity_map)
+
     def test_delete_disk_with_invalid_name(self):
         response = self.request_gce('/fake_project/zones/nova/disks/fake-disk',
                                     method="DELETE")
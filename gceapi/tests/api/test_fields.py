@@ -63,3 +63,31 @@ class FieldsTest(test.TestCase):
                     'yet/bla']
         res = utils.split_by_comma(string)
         self.assertEqual(res, expected)
+
+    def test_compile_template(self):
+        plan = utils.compile_template('one/smth,one/else,two(a,b/c),two/d')
+        self.assertEqual({'one': {'smth': None, 'else': None},
+                          'two': {'a': None, 'b': {'c': None}, 'd': None}},
+                         plan)
+        self.assertIs(plan, utils.compile_template(
+            'one/smth,one/else,two(a,b/c),two/d'))
+        self.assertEqual({'one': None},
+                         utils.compile_template('one/smth,one'))
+        for template in ('', 'one,', 'one(two', 'one)', 'one(two)three',
+                         'one//two'):
+            self.assertRaises(ValueError, utils.compile_template, template)
+
+    def test_apply_plan(self):
+        dct = {'kind': 'list',
+               'items': {'zones/a': {'instances': [{'name': 'i1', 'id': 1},
+                                                   {'name': 'i2'}]},
+                         'zones/b': {'warning': 'empty'}}}
+        plan = utils.compile_template('kind,nextPageToken,'
+                                      'items/*/instances(name,id)')
+        self.assertEqual(
+            {'kind': 'list',
+             'items': {'zones/a': {'instances': [{'name': 'i1', 'id': 1},
+                                                 {'name': 'i2'}]},
+                       'zones/b': {}}},
+            utils.apply_plan(plan, dct))
+        self.assertRaises(ValueError, utils.apply_plan, plan, dct, True)
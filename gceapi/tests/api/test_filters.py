@@ -0,0 +1,83 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from gceapi.api import filters
+from gceapi import exception
+from gceapi import test
+
+ITEM = {
+    "name": "instance-1",
+    "status": "RUNNING",
+    "memoryMb": 2048,
+    "canIpForward": False,
+    "networkInterfaces": [
+        {"networkIP": "10.0.0.3"},
+        {"networkIP": "192.168.0.5"},
+    ],
+}
+
+
+class FiltersTest(test.TestCase):
+
+    def _match(self, filter_string, item=ITEM):
+        return filters.compile_filter(filter_string).match(item.get)
+
+    def test_full_match(self):
+        self.assertTrue(self._match("name eq instance-1"))
+        self.assertTrue(self._match("name eq 'instance-.*'"))
+        self.assertFalse(self._match("name eq instance"))
+        self.assertFalse(self._match("name eq nstance-1"))
+        self.assertTrue(self._match("name ne instance"))
+        self.assertTrue(self._match("canIpForward eq false"))
+
+    def test_nested_path(self):
+        self.assertTrue(self._match(
+            "networkInterfaces.networkIP eq 192\.168\..*"))
+        self.assertFalse(self._match(
+            "networkInterfaces.networkIP ne 10\.0\.0\.3"))
+        self.assertFalse(self._match("networkInterfaces.unknown eq .*"))
+        self.assertTrue(self._match("unknown.networkIP ne .*"))
+
+    def test_numbers(self):
+        self.assertTrue(self._match("memoryMb eq 2048"))
+        self.assertTrue(self._match("memoryMb eq 2048.0"))
+        self.assertTrue(self._match("memoryMb gt 1024"))
+        self.assertFalse(self._match("memoryMb lt 1024"))
+        self.assertTrue(self._match("memoryMb le 2048"))
+
+    def test_clauses(self):
+        self.assertTrue(self._match(
+            "(name eq 'instance-(1|2)') (status ne STOPPED)"))
+        self.assertFalse(self._match(
+            "(name eq instance-1) (status eq STOPPED)"))
+
+    def test_pushdown_values(self):
+        clauses = filters.compile_filter(
+            "(name eq instance-1) (status eq RUN.*) (memoryMb ge 1)").clauses
+        self.assertEqual(("instance-1", None),
+                         (clauses[0].value, clauses[0].prefix))
+        self.assertEqual((None, "RUN"), (clauses[1].value, clauses[1].prefix))
+        self.assertEqual((None, None), (clauses[2].value, clauses[2].prefix))
+
+    def test_invalid_filter(self):
+        for filter_string in ("name", "name is instance-1",
+                              "memoryMb gt big", "name eq (",
+                              "(name eq instance-1", "name.1 eq 1",
+                              "(name eq instance-1) status eq DONE"):
+            self.assertRaises(exception.InvalidInput,
+                              filters.compile_filter, filter_string)
+
+    def test_cache(self):
+        compiled = filters.compile_filter("name eq cached")
+        self.assertIs(compiled, filters.compile_filter("name eq cached"))
@@ -14,8 +14,11 @@
 
 import copy
 
+from gceapi.api import firewall_api
 import gceapi.context
+from gceapi import db
 from gceapi.tests.api import common
+from gceapi.tests.api import fake_request
 
 
 DEFAULT_FIREWALL = {
@@ -289,3 +292,27 @@ class FirewallsControllerTest(common.GCEControllerTest):
                 "/fake_project/global/firewalls/fake-firewall",
                 method="DELETE")
         self.assertEqual(404, response.status_int)
+
+    def test_db_cache_follows_writes(self):
+        ctx = gceapi.context.RequestContext(
+            "fake_user", fake_request.PROJECT_ID, overwrite=False)
+        api = firewall_api.API()
+        firewalls = api._get_db_items_dict(ctx)
+        item = firewalls["a4ab9c5f-f0b5-4952-8e76-6a8ca0d0a402"]
+        item["network_name"] = "changed"
+        api._update_db_item(ctx, item)
+        api._delete_db_item(ctx,
+                            {"id": "b599598d-41b9-4075-a47e-019ba785c243"})
+        api._add_db_item(ctx, {"id": "new-firewall",
+                               "creationTimestamp": "",
+                               "network_name": "private"})
+
+        self.stubs.Set(db, "get_items", None)
+        firewalls = api._get_db_items_dict(ctx)
+        self.assertEqual("changed",
+                         firewalls["a4ab9c5f-f0b5-4952-8e76-6a8ca0d0a402"].
+                         get("network_name"))
+        self.assertNotIn("b599598d-41b9-4075-a47e-019ba785c243", firewalls)
+        self.assertIn("new-firewall", firewalls)
+        self.assertEqual(firewalls["new-firewall"],
+                         api._get_db_item_by_id(ctx, "new-firewall"))
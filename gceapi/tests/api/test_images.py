@@ -108,6 +108,17 @@ class ImagesControllerTest(common.GCEControllerTest):
         self.assertIn(EXPECTED_IMAGE_1, response_images)
         self.assertIn(EXPECTED_IMAGE_2, response_images)
 
+    def test_get_image_list_paged(self):
+        url = "/fake_project/global/images?maxResults=1"
+        response = self.request_gce(url)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([EXPECTED_IMAGE_1], response.json_body["items"])
+
+        response = self.request_gce(url + "&pageToken=" +
+                                    response.json_body["nextPageToken"])
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([EXPECTED_IMAGE_2], response.json_body["items"])
+
     def test_get_image(self):
         response = self.request_gce("/fake_project/global/images/fake-image-1")
         self.assertEqual(200, response.status_int)
@@ -14,7 +14,11 @@
 
 import copy
 
+from gceapi.api import db_reconciler
+from gceapi.api import instances
+from gceapi import db
 from gceapi.tests.api import common
+from gceapi.tests.api import fake_cinder_client
 
 EXPECTED_INSTANCES = [{
     "kind": "compute#instance",
@@ -116,6 +120,17 @@ class InstancesTest(common.GCEControllerTest):
         self.assertEqual(len(instances), 1)
         self.assertDictEqual(instances[0], EXPECTED_INSTANCES[0])
 
+    def test_get_instance_list_filtered_by_nested_field(self):
+        response = self.request_gce("/fake_project/zones/nova/instances"
+                                    "?filter=networkInterfaces.networkIP+eq+"
+                                    "10%5C.100%5C.0%5C.3")
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([EXPECTED_INSTANCES[1]], response.json_body["items"])
+
+        response = self.request_gce("/fake_project/zones/nova/instances"
+                                    "?filter=name+is+i1")
+        self.assertEqual(400, response.status_int)
+
     def test_get_instance_list(self):
         response = self.request_gce('/fake_project/zones/nova/instances')
         expected = {
@@ -131,6 +146,110 @@ class InstancesTest(common.GCEControllerTest):
         self.assertDictEqual(instances[0], EXPECTED_INSTANCES[0])
         self.assertDictEqual(instances[1], EXPECTED_INSTANCES[1])
 
+    def test_get_instance_list_loads_volumes_at_once(self):
+        def fail_get(self, volume):
+            raise Exception("volume is got separately")
+
+        self.stubs.Set(fake_cinder_client.FakeVolumes, "get", fail_get)
+        response = self.request_gce('/fake_project/zones/nova/instances')
+        self.assertEqual(200, response.status_int)
+        instances = response.json_body["items"]
+        self.assertDictEqual(instances[0], EXPECTED_INSTANCES[0])
+
+    def test_get_instance_list_pages_volumes(self):
+        def fail_get(self, volume):
+            raise Exception("volume is got separately")
+
+        list_volumes = fake_cinder_client.FakeVolumes.list
+
+        def list_page(self, detailed=True, search_opts=None):
+            return list_volumes(self, detailed, search_opts)[:1]
+
+        self.stubs.Set(fake_cinder_client.FakeVolumes, "get", fail_get)
+        self.stubs.Set(fake_cinder_client.FakeVolumes, "list", list_page)
+        response = self.request_gce('/fake_project/zones/nova/instances')
+        self.assertEqual(200, response.status_int)
+        instances = response.json_body["items"]
+        self.assertDictEqual(instances[0], EXPECTED_INSTANCES[0])
+
+    def test_get_instance_list_reads_db_once_per_kind(self):
+        reads = []
+        fake_get_items = db.get_items
+
+        def get_items(context, kind, parent_name=None):
+            reads.append(kind)
+            return fake_get_items(context, kind, parent_name)
+
+        def fail(*args, **kwargs):
+            raise Exception("item is read separately")
+
+        self.stubs.Set(db, "get_items", get_items)
+        self.stubs.Set(db, "get_item_by_id", fail)
+        self.stubs.Set(db, "get_item_by_name", fail)
+        response = self.request_gce('/fake_project/zones/nova/instances')
+        self.assertEqual(200, response.status_int)
+        self.assertItemsEqual(["instance", "attached_disk", "access_config"],
+                              reads)
+
+    def test_get_instance_list_is_read_only(self):
+        def fail(*args, **kwargs):
+            raise Exception("item is written by list")
+
+        spawned = []
+        self.stubs.Set(db_reconciler, "_spawn",
+                       lambda func, *args: spawned.append((func, args)))
+        self.db_fixture.items = [item for item in self.db_fixture.items
+                                 if item["kind"] != "attached_disk"]
+        self.db_fixture.items.append({
+            "kind": "access_config",
+            "id": "i1-192.168.138.200",
+            "instance_name": "i1",
+            "nic": "private",
+            "name": "obsolete ip for i1",
+            "type": "ONE_TO_ONE_NAT",
+            "addr": "192.168.138.200"
+        })
+        db_items = copy.deepcopy(self.db_fixture.items)
+        for func in ("add_item", "add_items", "delete_item", "delete_items"):
+            self.stubs.Set(db, func, fail)
+
+        response = self.request_gce('/fake_project/zones/nova/instances')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(db_items, self.db_fixture.items)
+        self.assertEqual(1, len(spawned))
+        func, args = spawned[0]
+        self.assertItemsEqual(
+            ["attached_disk", "access_config"],
+            [api._get_type() for api, dummy, dummy in args[1]])
+
+    def test_get_instance_list_formats_page_only(self):
+        formatted = []
+        format_item = instances.Controller.format_item
+
+        def fake_format_item(self, request, instance, scope):
+            formatted.append(instance["name"])
+            return format_item(self, request, instance, scope)
+
+        self.stubs.Set(instances.Controller, "format_item", fake_format_item)
+        response = self.request_gce('/fake_project/zones/nova/instances'
+                                    '?maxResults=1')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(["i1"], formatted)
+
+        del formatted[:]
+        response = self.request_gce('/fake_project/zones/nova/instances'
+                                    '?maxResults=1&pageToken=' +
+                                    response.json_body["nextPageToken"])
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([EXPECTED_INSTANCES[1]], response.json_body["items"])
+        self.assertEqual(["i2"], formatted)
+
+        del formatted[:]
+        response = self.request_gce('/fake_project/aggregated/instances'
+                                    '?filter=name+eq+i1')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(["i1"], formatted)
+
     def test_get_instance_aggregated_list_filtered(self):
         response = self.request_gce("/fake_project/aggregated/instances"
                                     "?filter=name+eq+i2")
@@ -14,8 +14,17 @@
 
 import copy
 
+import eventlet
+
+from gceapi.api import machine_type_api
 from gceapi.api import machine_types
+from gceapi.api import scopes
+from gceapi.api import zone_api
+from gceapi import context
+from gceapi import exception
 from gceapi.tests.api import common
+from gceapi.tests.api import fake_nova_client
+from gceapi.tests.api import fake_request
 
 
 EXPECTED_FLAVORS = [{
@@ -90,13 +99,14 @@ class MachineTypesTest(common.GCEControllerTest):
                 "selfLink": "http://localhost/compute/v1beta15/projects"
                     "/fake_project/zones/nova/machineTypes",
                 "items": [EXPECTED_FLAVORS[1]],
-                "nextPageToken": "1"
                 }
 
-        self.assertDictEqual(response.json_body, expected)
+        response_body = response.json_body
+        page_token = response_body.pop("nextPageToken")
+        self.assertDictEqual(response_body, expected)
 
         response = self.request_gce("/fake_project/zones/nova/machineTypes"
-                                    "?maxResults=1&pageToken=1")
+                                    "?maxResults=1&pageToken=" + page_token)
         expected = {
                 "kind": "compute#machineTypeList",
                 "id": "projects/fake_project/zones/nova/machineTypes",
@@ -107,6 +117,33 @@ class MachineTypesTest(common.GCEControllerTest):
 
         self.assertDictEqual(response.json_body, expected)
 
+    def test_get_flavor_list_invalid_page_token(self):
+        response = self.request_gce("/fake_project/zones/nova/machineTypes"
+                                    "?maxResults=1&pageToken=1")
+        self.assertEqual(400, response.status_int)
+
+        response = self.request_gce("/fake_project/zones/nova/machineTypes"
+                                    "?maxResults=1")
+        page_token = response.json_body["nextPageToken"]
+        response = self.request_gce("/fake_project/aggregated/machineTypes"
+                                    "?maxResults=1&pageToken=" + page_token)
+        self.assertEqual(400, response.status_int)
+
+    def test_get_flavor_list_fields(self):
+        response = self.request_gce("/fake_project/zones/nova/machineTypes"
+                                    "?fields=kind,items(name,guestCpus)")
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(
+            {"kind": "compute#machineTypeList",
+             "items": [{"name": flavor["name"],
+                        "guestCpus": flavor["guestCpus"]}
+                       for flavor in EXPECTED_FLAVORS]},
+            response.json_body)
+
+        response = self.request_gce("/fake_project/zones/nova/machineTypes"
+                                    "?fields=items(name")
+        self.assertEqual(400, response.status_int)
+
     def test_get_flavor_list(self):
         response = self.request_gce('/fake_project/zones/nova/machineTypes')
         expected = {
@@ -146,3 +183,107 @@ class MachineTypesTest(common.GCEControllerTest):
         }
 
         self.assertEqual(response.json_body, expected)
+
+    def test_get_flavor_aggregated_list_lists_flavors_once(self):
+        self.flags(flavor_cache_ttl=0)
+        self.addCleanup(machine_type_api.CONF.clear_override,
+                        "flavor_cache_ttl")
+        requests = self._count_flavor_requests()
+        self.stubs.Set(zone_api.API, "get_items_as_scopes",
+                       lambda self, context: [scopes.ZoneScope("nova"),
+                                              scopes.ZoneScope("zone2")])
+        response = self.request_gce('/fake_project/aggregated/machineTypes')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(["zones/nova", "zones/zone2"],
+                         sorted(response.json_body["items"]))
+        self.assertEqual(["list"], requests)
+
+    def test_get_aggregated_list_by_scopes_concurrently(self):
+        events = []
+        get_items = machine_type_api.API.get_items
+
+        def fake_get_items(self, context, scope=None):
+            events.append(("start", scope.get_name()))
+            eventlet.sleep(0)
+            events.append(("end", scope.get_name()))
+            return get_items(self, context, scope)
+
+        # a kind which lists items of a zone without listing all zones
+        self.stubs.Set(machine_type_api.API, "get_items", fake_get_items)
+        self.stubs.Set(machine_type_api.API, "get_aggregation_scopes",
+                       lambda self, context: [scopes.ZoneScope("nova"),
+                                              scopes.ZoneScope("zone2")])
+        response = self.request_gce('/fake_project/aggregated/machineTypes')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(["zones/nova", "zones/zone2"],
+                         sorted(response.json_body["items"]))
+        self.assertEqual([("start", "nova"), ("start", "zone2"),
+                          ("end", "nova"), ("end", "zone2")], events)
+
+    def _get_context(self):
+        ctx = context.RequestContext("fake_user", fake_request.PROJECT_ID,
+                                     overwrite=False)
+        ctx.service_catalog = fake_request.FAKE_SERVICE_CATALOG
+        return ctx
+
+    def _count_flavor_requests(self):
+        requests = []
+        fake_list = fake_nova_client.FakeFlavors.list
+        fake_get = fake_nova_client.FakeFlavors.get
+
+        def list_flavors(self, *args, **kwargs):
+            requests.append("list")
+            return fake_list(self, *args, **kwargs)
+
+        def get_flavor(self, flavor):
+            requests.append(flavor)
+            return fake_get(self, flavor)
+
+        self.stubs.Set(fake_nova_client.FakeFlavors, "list", list_flavors)
+        self.stubs.Set(fake_nova_client.FakeFlavors, "get", get_flavor)
+        return requests
+
+    def test_flavor_is_loaded_once_per_request(self):
+        self.flags(flavor_cache_ttl=0)
+        self.addCleanup(machine_type_api.CONF.clear_override,
+                        "flavor_cache_ttl")
+        requests = self._count_flavor_requests()
+        api = machine_type_api.API()
+        for i in xrange(2):
+            ctx = self._get_context()
+            self.assertEqual("m1-small", api.get_item_by_id(ctx, "2")["name"])
+            self.assertEqual("m1-small", api.get_item_by_id(ctx, "2")["name"])
+        self.assertEqual(["2", "2"], requests)
+
+    def test_flavors_are_cached(self):
+        requests = self._count_flavor_requests()
+        api = machine_type_api.API()
+        api.get_items(self._get_context())
+        item = api.get_item(self._get_context(), "m1-small")
+        item["name"] = "changed"
+        self.assertEqual("m1-small",
+                         api.get_item_by_id(self._get_context(), "2")["name"])
+        self.assertRaises(exception.NotFound,
+                          api.get_item, self._get_context(), "m1-fake")
+        self.assertEqual(["list"], requests)
+
+        machine_type_api.invalidate_flavor_cache(fake_request.PROJECT_ID)
+        api.get_item(self._get_context(), "m1-small")
+        self.assertEqual(["list", "list"], requests)
+
+    def test_flavors_are_refreshed_before_expiration(self):
+        requests = self._count_flavor_requests()
+        refreshes = []
+        self.stubs.Set(machine_type_api.API, "_start_refresh",
+                       lambda self, context: refreshes.append(context))
+        now = [1000.0]
+        self.stubs.Set(machine_type_api.time, "time", lambda: now[0])
+        api = machine_type_api.API()
+        api.get_items(self._get_context())
+        now[0] += machine_type_api.CONF.flavor_cache_ttl / 2
+        api.get_items(self._get_context())
+        self.assertEqual([], refreshes)
+        now[0] += machine_type_api.CONF.flavor_cache_ttl * 0.4
+        api.get_items(self._get_context())
+        self.assertEqual(1, len(refreshes))
+        self.assertEqual(["list"], requests)
@@ -12,7 +12,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo.config import cfg
+
 from gceapi.api import networks
+from gceapi import db
 from gceapi.tests.api import common
 
 
@@ -81,6 +84,18 @@ class NetworksControllerTest(common.GCEControllerTest):
 
         self.assertEqual(response.json_body, expected)
 
+    def test_get_networks_list_paged(self):
+        url = "/fake_project/global/networks?maxResults=1"
+        response = self.request_gce(url)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(EXPECTED_NETWORKS[:1], response.json_body["items"])
+
+        response = self.request_gce(url + "&pageToken=" +
+                                    response.json_body["nextPageToken"])
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(EXPECTED_NETWORKS[1:], response.json_body["items"])
+        self.assertNotIn("nextPageToken", response.json_body)
+
     def test_create_network(self):
         request_body = {
                         "IPv4Range": "10.100.0.0/24",
@@ -103,6 +118,19 @@ class NetworksControllerTest(common.GCEControllerTest):
         self.assertEqual(200, response.status_int)
         self.assertEqual(response.json_body, expected)
 
+    def test_create_network_fields(self):
+        request_body = {
+                        "IPv4Range": "10.100.0.0/24",
+                        "name": "mynet",
+                        }
+        response = self.request_gce('/fake_project/global/networks'
+                                    '?fields=operationType,status',
+                                    method="POST",
+                                    body=request_body)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual({"operationType": "insert", "status": "DONE"},
+                         response.json_body)
+
     def test_delete_network(self):
         response = self.request_gce(
                 '/fake_project/global/networks/public', method='DELETE')
@@ -115,3 +143,28 @@ class NetworksControllerTest(common.GCEControllerTest):
         expected.update(common.COMMON_FINISHED_OPERATION)
         self.assertEqual(200, response.status_int)
         self.assertEqual(expected, response.json_body)
+
+    def test_request_transaction(self):
+        self.flags(db_request_transaction=True)
+        self.addCleanup(cfg.CONF.clear_override,
+                        "db_request_transaction")
+        calls = []
+        self.stubs.Set(db, "begin_unit_of_work",
+                       lambda context: calls.append("begin"))
+
+        def fake_end_unit_of_work(context, commit=True):
+            calls.append("commit" if commit else "rollback")
+            return {"statements": 0, "commits": int(commit)}
+
+        self.stubs.Set(db, "end_unit_of_work",
+                       fake_end_unit_of_work)
+
+        response = self.request_gce('/fake_project/global/networks/public')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(["begin", "commit"], calls)
+
+        del calls[:]
+        response = self.request_gce(
+            '/fake_project/global/networks/wrongNetworkName')
+        self.assertEqual(404, response.status_int)
+        self.assertEqual(["begin", "rollback"], calls)
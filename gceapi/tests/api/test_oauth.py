@@ -0,0 +1,158 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import json
+
+from keystoneclient import exceptions
+import webob
+
+from gceapi.api import oauth
+from gceapi.api import oauth_code_store
+from gceapi.openstack.common import timeutils
+from gceapi import test
+from gceapi.tests.api import utils
+
+
+class AuthProtocolTest(test.TestCase):
+
+    def setUp(self):
+        super(AuthProtocolTest, self).setUp()
+        self.keystone_requests = []
+        self.stubs.Set(oauth.keystone_client, "Client",
+                       self._fake_keystone_client)
+        self.app_tokens = []
+        self.auth = oauth.AuthProtocol(self._fake_app)
+
+    def _fake_keystone_client(self, token=None, tenant_name=None, **kwargs):
+        self.keystone_requests.append((token, tenant_name))
+        if token == "bad_token":
+            raise exceptions.Unauthorized()
+        expires = timeutils.utcnow() + datetime.timedelta(hours=1)
+        return utils.FakeObject({"auth_ref": {"token": {
+            "id": "keystone-%s-%s" % (token, tenant_name),
+            "expires": timeutils.isotime(expires)}}})
+
+    def _fake_app(self, env, start_response):
+        self.app_tokens.append(env["HTTP_X_AUTH_TOKEN"])
+        start_response('200 OK', [])
+        return ["ok"]
+
+    def _call(self, token, project="fake_project"):
+        env = {"HTTP_AUTHORIZATION": "Bearer " + token,
+               "PATH_INFO": "/%s/zones" % project}
+        statuses = []
+        body = self.auth(env, lambda status, headers: statuses.append(status))
+        return statuses[0], body
+
+    def test_keystone_token_is_cached(self):
+        self._call("good_token")
+        self._call("good_token")
+        self._call("good_token", "other_project")
+        self.assertEqual([("good_token", "fake_project"),
+                          ("good_token", "other_project")],
+                         self.keystone_requests)
+        self.assertEqual(["keystone-good_token-fake_project",
+                          "keystone-good_token-fake_project",
+                          "keystone-good_token-other_project"],
+                         self.app_tokens)
+
+    def test_rejected_token_is_cached(self):
+        self.assertEqual("401 Unauthorized", self._call("bad_token")[0])
+        self.assertEqual("401 Unauthorized", self._call("bad_token")[0])
+        self.assertEqual(1, len(self.keystone_requests))
+        self.assertEqual([], self.app_tokens)
+
+    def test_expiring_token_is_not_cached(self):
+        self.flags(oauth_token_expiry_margin=3600)
+        self.addCleanup(oauth.FLAGS.clear_override,
+                        "oauth_token_expiry_margin")
+        self._call("good_token")
+        self._call("good_token")
+        self.assertEqual(2, len(self.keystone_requests))
+
+
+class ControllerTest(test.TestCase):
+
+    CLIENT_ID = "32555940559.apps.googleusercontent.com"
+    REDIRECT_URI = "urn:ietf:wg:oauth:2.0:oob"
+
+    def setUp(self):
+        super(ControllerTest, self).setUp()
+        self.store = oauth_code_store.MemoryCodeStore(
+            oauth.Controller.AUTH_TIMEOUT, 10)
+        self.stubs.Set(oauth_code_store, "get_code_store",
+                       lambda ttl: self.store)
+        self.stubs.Set(oauth.keystone_client, "Client",
+                       self._fake_keystone_client)
+        self.controller = oauth.Controller()
+
+    def _fake_keystone_client(self, **kwargs):
+        return utils.FakeObject({"auth_ref": {"token": {
+            "id": "fake_token",
+            "issued_at": "2014-01-20T11:00:00Z",
+            "expires": "2014-01-20T12:00:00Z"}}})
+
+    def _get_code(self):
+        req = webob.Request.blank("/auth?" + "&".join([
+            "client_id=" + self.CLIENT_ID,
+            "response_type=code",
+            "redirect_uri=" + self.REDIRECT_URI]))
+        html_page = self.controller.auth(req)
+        return html_page.split('name="code" value="')[1].split('"')[0]
+
+    def _exchange_code(self, code):
+        req = webob.Request.blank("/token", POST={
+            "client_id": self.CLIENT_ID,
+            "client_secret": self.controller.VALID_CLIENTS[self.CLIENT_ID],
+            "grant_type": "authorization_code",
+            "code": code})
+        return self.controller.token(req)
+
+    def test_code_is_exchanged_once(self):
+        code = self._get_code()
+        req = webob.Request.blank("/approval", POST={
+            "code": code,
+            "redirect_uri": self.REDIRECT_URI,
+            "username": "admin",
+            "password": "password"})
+        self.controller.approval(req)
+
+        result = json.loads(self._exchange_code(code))
+        self.assertEqual("fake_token", result["access_token"])
+        self.assertEqual(3600, result["expires_in"])
+        self.assertRaises(oauth.OAuthFault, self._exchange_code, code)
+
+    def test_purged_code_is_not_approved(self):
+        code = self._get_code()
+
+        def purge_code(**kwargs):
+            self.store.delete(code)
+            return self._fake_keystone_client(**kwargs)
+
+        self.stubs.Set(oauth.keystone_client, "Client", purge_code)
+        req = webob.Request.blank("/approval", POST={
+            "code": code,
+            "redirect_uri": self.REDIRECT_URI,
+            "username": "admin",
+            "password": "password"})
+        fault = self.assertRaises(oauth.OAuthFault,
+                                  self.controller.approval, req)
+        self.assertEqual(400, fault.wrapped_exc.status_int)
+        self.assertEqual({"error": "invalid_grant"},
+                         fault.wrapped_exc.json_body)
+
+    def test_unapproved_code_is_not_exchanged(self):
+        code = self._get_code()
+        self.assertRaises(oauth.OAuthFault, self._exchange_code, code)
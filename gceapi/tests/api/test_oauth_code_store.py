@@ -0,0 +1,80 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from gceapi.api import oauth_code_store
+from gceapi import test
+from gceapi.tests.api import fake_db
+
+
+class CodeStoreTestMixin(object):
+
+    def setUp(self):
+        super(CodeStoreTestMixin, self).setUp()
+        self.now = 1000.0
+        self.stubs.Set(time, "time", lambda: self.now)
+
+    def test_code_expires_after_last_update(self):
+        self.store.add("code", {"auth_token": None})
+        self.now += 200
+        self.store.update("code", {"auth_token": "token"})
+        self.now += 200
+        self.assertEqual("token", self.store.get("code")["auth_token"])
+        self.now += 200
+        self.assertIsNone(self.store.get("code"))
+
+    def test_purge_expired(self):
+        self.store.add("old", {"auth_token": None})
+        self.now += 200
+        self.store.add("new", {"auth_token": None})
+        self.now += 200
+        self.assertEqual(1, self.store.purge_expired())
+        self.assertIsNone(self.store.get("old"))
+        self.assertIsNotNone(self.store.get("new"))
+
+    def test_oldest_code_is_evicted(self):
+        for i in xrange(3):
+            self.store.add("code%d" % i, {"auth_token": None})
+            self.now += 1
+        self.assertIsNone(self.store.get("code0"))
+        self.assertIsNotNone(self.store.get("code1"))
+        self.assertIsNotNone(self.store.get("code2"))
+
+    def test_update_purged_code(self):
+        self.store.add("code", {"auth_token": None})
+        self.now += 400
+        self.assertEqual(1, self.store.purge_expired())
+        self.assertFalse(self.store.update("code", {"auth_token": "token"}))
+        self.assertIsNone(self.store.get("code"))
+
+    def test_delete(self):
+        self.store.add("code", {"auth_token": None})
+        self.store.delete("code")
+        self.assertIsNone(self.store.get("code"))
+
+
+class MemoryCodeStoreTest(CodeStoreTestMixin, test.TestCase):
+
+    def setUp(self):
+        super(MemoryCodeStoreTest, self).setUp()
+        self.store = oauth_code_store.MemoryCodeStore(300, 2)
+
+
+class DBCodeStoreTest(CodeStoreTestMixin, test.TestCase):
+
+    def setUp(self):
+        super(DBCodeStoreTest, self).setUp()
+        self.useFixture(fake_db.DBFixture(self.stubs))
+        self.store = oauth_code_store.DBCodeStore(300, 2)
@@ -12,7 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
+import json
+
+from gceapi.api import operation_util
 from gceapi.api import operations
+from gceapi import db
 from gceapi.tests.api import common
 
 FAKE_ADD_INSTANCE = {
@@ -321,3 +326,118 @@ class OperationsControllerTest(common.GCEControllerTest):
                 'operation-a7b6bb82-d51f-4f04-a07c-bd9241bc2aac',
                 method="DELETE")
         self.assertEqual(204, response.status_int)
+
+    def test_list_zone_operations_filtered_in_db(self):
+        calls = []
+        get_operations = db.get_operations
+
+        def fake_get_operations(context, filters=None, *args, **kwargs):
+            calls.append(filters)
+            return get_operations(context, filters, *args, **kwargs)
+
+        self.stubs.Set(db, "get_operations", fake_get_operations)
+        self.stubs.Set(db, "get_items", None)
+        response = self.request_gce('/fake_project/zones/nova/operations')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(6, len(response.json_body["items"]))
+        self.assertEqual([{"scope_type": "zone", "scope_name": "nova"}],
+                         calls)
+
+    def test_purge_operations(self):
+        self.assertEqual(0, operation_util.purge_operations())
+
+        calls = []
+        batches = [3, 3, 1, 0]
+
+        def fake_purge_operations(context, insert_time_before, keep_count,
+                                  limit):
+            self.assertTrue(context.is_admin)
+            calls.append((insert_time_before, keep_count, limit))
+            return batches.pop(0)
+
+        self.stubs.Set(db, "purge_operations", fake_purge_operations)
+        self.assertEqual(7, operation_util.purge_operations(
+            max_age=3600, batch_size=3))
+        self.assertEqual([("2013-12-27T08:46:34.684354Z", None, 3)] * 4,
+                         calls)
+
+        del calls[:]
+        batches = [0]
+        self.flags(operation_max_count=10)
+        self.addCleanup(operation_util.CONF.clear_override,
+                        "operation_max_count")
+        self.assertEqual(0, operation_util.purge_operations())
+        self.assertEqual([(None, 10, 500)], calls)
+
+    def test_list_zone_operations_paged_in_db(self):
+        self.stubs.Set(db, "get_items", None)
+        url = '/fake_project/zones/nova/operations?maxResults=4'
+        response = self.request_gce(url)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(
+            ["operation-05e2a2b2-9708-4386-97cc-2318df3357b6",
+             "operation-1cfd73fa-9b79-43ef-bbc7-c44bc514ba2e",
+             "operation-3f6f1326-3e7c-4076-be6b-939147d031ae",
+             "operation-47be73d8-b8fe-4148-9e3b-3f323136ee57"],
+            [item["name"] for item in response.json_body["items"]])
+        page_token = response.json_body["nextPageToken"]
+
+        response = self.request_gce(url + "&pageToken=" + page_token)
+        self.assertEqual(
+            ["operation-6fc4e7e2-c0c8-4f97-bf1d-f6f958eb17b7",
+             "operation-fbd91157-91e9-4121-af74-090260aa38cc"],
+            [item["name"] for item in response.json_body["items"]])
+        self.assertNotIn("nextPageToken", response.json_body)
+
+    def test_list_zone_operations_invalid_page_marker(self):
+        url = '/fake_project/zones/nova/operations?maxResults=4'
+        response = self.request_gce(url)
+        page = json.loads(base64.urlsafe_b64decode(
+            str(response.json_body["nextPageToken"])))
+        for marker in ([1, 2, 3], ["x"], [["a"], {}], "x"):
+            page["marker"] = marker
+            page_token = base64.urlsafe_b64encode(json.dumps(page))
+            response = self.request_gce(url + "&pageToken=" + page_token)
+            self.assertEqual(400, response.status_int)
+
+    def test_list_zone_operations_filtered_by_name_in_db(self):
+        calls = []
+        get_operations = db.get_operations
+
+        def fake_get_operations(context, filters=None, *args, **kwargs):
+            calls.append(kwargs.get("prefixes"))
+            return get_operations(context, filters, *args, **kwargs)
+
+        self.stubs.Set(db, "get_operations", fake_get_operations)
+        response = self.request_gce('/fake_project/zones/nova/operations'
+                                    '?filter=name+eq+operation-f.*')
+        self.assertEqual([FAKE_DELETE_INSTANCE], response.json_body["items"])
+        self.assertEqual([[("name", "operation-f", True)]], calls)
+
+    def test_list_zone_operations_filtered_by_clauses_in_db(self):
+        calls = []
+        get_operations = db.get_operations
+
+        def fake_get_operations(context, filters=None, *args, **kwargs):
+            calls.append((filters, kwargs.get("exclude")))
+            return get_operations(context, filters, *args, **kwargs)
+
+        self.stubs.Set(db, "get_operations", fake_get_operations)
+        self.stubs.Set(db, "get_items", None)
+        response = self.request_gce(
+            '/fake_project/zones/nova/operations?filter='
+            '(status+eq+DONE)+(name+ne+operation-fbd91157-91e9-4121-'
+            'af74-090260aa38cc)')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(5, len(response.json_body["items"]))
+        self.assertNotIn(FAKE_DELETE_INSTANCE, response.json_body["items"])
+        self.assertEqual(
+            ({"scope_type": "zone", "scope_name": "nova", "status": "DONE"},
+             {"name": ["operation-fbd91157-91e9-4121-af74-090260aa38cc"]}),
+            calls[-1])
+
+    def test_list_zone_operations_filtered_by_status_in_db(self):
+        # all operations of the zone are finished in OpenStack
+        response = self.request_gce('/fake_project/zones/nova/operations'
+                                    '?filter=status+eq+DONE')
+        self.assertEqual(6, len(response.json_body["items"]))
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from gceapi import db
 from gceapi.tests.api import common
 
 FAKE_LOCAL_ROUTE_1 = {
@@ -119,6 +120,21 @@ class RoutesControllerTest(common.GCEControllerTest):
                  FAKE_CUSTOM_ROUTE_1, FAKE_CUSTOM_ROUTE_2, FAKE_LOCAL_ROUTE_2],
                 response_routes)
 
+    def test_list_routes_syncs_db_in_bulk(self):
+        def fail(*args, **kwargs):
+            raise Exception("item is written separately")
+
+        self.stubs.Set(db, "add_item", fail)
+        self.stubs.Set(db, "delete_item", fail)
+        response = self.request_gce('/fake_project/global/routes')
+        self.assertEqual(200, response.status_int)
+        route_names = [item["id"].split("//")[-1]
+                       for item in self.db_fixture.items
+                       if item["kind"] == "route"]
+        self.assertNotIn("obsolete-route", route_names)
+        self.assertIn("default-route-734b9c83-3a8b-4350-8fbf-d40f571ee163-"
+                      "internet", route_names)
+
     def test_get_route(self):
         response = self.request_gce('/fake_project/global/routes/'
                                     'custom-route-1')
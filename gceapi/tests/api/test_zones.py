@@ -12,8 +12,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from novaclient import exceptions
+
+from gceapi.api import zone_api
 from gceapi.api import zones
+from gceapi import context
 from gceapi.tests.api import common
+from gceapi.tests.api import fake_nova_client
+from gceapi.tests.api import fake_request
 
 
 EXPECTED_ZONES = [{
@@ -70,3 +76,61 @@ class ZonesControllerTest(common.GCEControllerTest):
         }
 
         self.assertEqual(response.json_body, expected)
+
+    def _count_zone_requests(self):
+        requests = []
+        fake_list = fake_nova_client.FakeAvailabilityZones.list
+
+        def list_zones(self, *args, **kwargs):
+            requests.append(kwargs)
+            return fake_list(self, *args, **kwargs)
+
+        self.stubs.Set(fake_nova_client.FakeAvailabilityZones, "list",
+                       list_zones)
+        return requests
+
+    def test_zones_are_cached(self):
+        requests = self._count_zone_requests()
+        self.request_gce('/fake_project/zones')
+        self.request_gce('/fake_project/zones/nova')
+        self.assertEqual(1, len(requests))
+
+        zone_api.invalidate_zone_cache()
+        response = self.request_gce('/fake_project/zones/nova')
+        self.assertEqual(EXPECTED_ZONES[0], response.json_body)
+        self.assertEqual(2, len(requests))
+
+    def test_zones_are_cached_by_admin_role(self):
+        fake_list = fake_nova_client.FakeAvailabilityZones.list
+
+        def list_zones(self, detailed=True):
+            if detailed and not is_admin[0]:
+                raise exceptions.Forbidden(
+                    exceptions.Forbidden.http_status)
+            return fake_list(self, detailed)
+
+        self.stubs.Set(fake_nova_client.FakeAvailabilityZones, "list",
+                       list_zones)
+        api = zone_api.API()
+        is_admin = [True]
+        admin_context = self._get_context(["admin"])
+        self.assertEqual(["grizzly"], api.get_items(admin_context)[0]["hosts"])
+        is_admin[0] = False
+        user_context = self._get_context(["member"])
+        self.assertEqual([], api.get_items(user_context)[0]["hosts"])
+        admin_context = self._get_context(["admin"])
+        self.assertEqual(["grizzly"], api.get_items(admin_context)[0]["hosts"])
+
+    def _get_context(self, roles):
+        ctx = context.RequestContext("fake_user", fake_request.PROJECT_ID,
+                                     roles=roles, overwrite=False)
+        ctx.service_catalog = fake_request.FAKE_SERVICE_CATALOG
+        return ctx
+
+    def test_zones_are_loaded_once_per_request(self):
+        self.flags(zone_cache_ttl=0)
+        self.addCleanup(zone_api.CONF.clear_override, "zone_cache_ttl")
+        requests = self._count_zone_requests()
+        response = self.request_gce('/fake_project/aggregated/machineTypes')
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(1, len(requests))
@@ -0,0 +1,48 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from gceapi.db.sqlalchemy import codec
+from gceapi import test
+
+
+PAYLOAD = {
+    "description": "main network",
+    "progress": 0,
+    "scope_name": None,
+    "hosts": ["host1", "host2"],
+}
+
+
+class CodecTest(test.TestCase):
+
+    def test_json_is_written_by_default(self):
+        text = codec.encode(PAYLOAD)
+        self.assertTrue(text.startswith(codec.JSON_PREFIX))
+        self.assertFalse(codec.is_legacy(text))
+        self.assertEqual(PAYLOAD, codec.decode(text))
+
+    def test_compressed_json(self):
+        self.flags(db_item_format="zjson")
+        self.addCleanup(codec.CONF.clear_override, "db_item_format")
+        text = codec.encode(PAYLOAD)
+        self.assertTrue(text.startswith(codec.ZJSON_PREFIX))
+        self.assertEqual(PAYLOAD, codec.decode(text))
+
+    def test_legacy_payload_is_read(self):
+        text = str(PAYLOAD)
+        self.assertTrue(codec.is_legacy(text))
+        self.assertEqual(PAYLOAD, codec.decode(text))
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, codec.encode, PAYLOAD, "pickle")
@@ -0,0 +1,85 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from gceapi import context
+from gceapi.db.sqlalchemy import api
+from gceapi import test
+
+
+class ReadRoutingTest(test.TestCase):
+
+    def setUp(self):
+        super(ReadRoutingTest, self).setUp()
+
+        def fake_get_session(slave_session=False):
+            return "slave" if slave_session else "master"
+
+        self.stubs.Set(api, "get_session", fake_get_session)
+        self.stubs.Set(api, "_last_writes", {})
+        self.stubs.Set(api, "_last_prune", 0)
+        self.flags(slave_connection="mysql://slave/gceapi", group="database")
+        self.flags(db_slave_read_calls=["get_items"])
+        self.addCleanup(api.CONF.clear_override, "slave_connection",
+                        "database")
+        self.addCleanup(api.CONF.clear_override, "db_slave_read_calls")
+        self.context = context.RequestContext("fake_user", "fake_project")
+
+    def test_configured_calls_read_from_slave(self):
+        self.assertEqual("slave",
+                         api._get_read_session(self.context, "get_items"))
+        self.assertEqual("master",
+                         api._get_read_session(self.context,
+                                               "get_item_by_id"))
+
+    def test_no_slave_connection(self):
+        self.flags(slave_connection="", group="database")
+        self.assertEqual("master",
+                         api._get_read_session(self.context, "get_items"))
+
+    def test_read_your_writes(self):
+        api.write_context(lambda context: None)(self.context)
+        self.assertTrue(self.context.db_written)
+        self.assertEqual("master",
+                         api._get_read_session(self.context, "get_items"))
+
+        # other request of the same project doesn't see lagging slave
+        other_context = context.RequestContext("fake_user", "fake_project")
+        self.assertEqual("master",
+                         api._get_read_session(other_context, "get_items"))
+        self.flags(db_slave_write_lag=0)
+        self.addCleanup(api.CONF.clear_override, "db_slave_write_lag")
+        self.assertEqual("slave",
+                         api._get_read_session(other_context, "get_items"))
+
+        other_project_context = context.RequestContext("fake_user",
+                                                       "other_project")
+        self.flags(db_slave_write_lag=5)
+        self.assertEqual("slave",
+                         api._get_read_session(other_project_context,
+                                               "get_items"))
+
+    def test_old_writes_are_dropped(self):
+        now = [1000.0]
+        self.stubs.Set(api.time, "time", lambda: now[0])
+        write = api.write_context(lambda context: None)
+        write(self.context)
+        now[0] += 3
+        write(context.RequestContext("fake_user", "other_project"))
+        self.assertEqual(["fake_project", "other_project"],
+                         sorted(api._last_writes))
+
+        now[0] += 3
+        write(context.RequestContext("fake_user", "third_project"))
+        self.assertEqual(["other_project", "third_project"],
+                         sorted(api._last_writes))
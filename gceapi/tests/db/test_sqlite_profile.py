@@ -0,0 +1,78 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+
+from gceapi import context
+from gceapi import db
+from gceapi.db.sqlalchemy import sqlite_profile
+from gceapi import exception
+from gceapi import test
+
+
+class SqliteProfileTest(test.TestCase):
+
+    def setUp(self):
+        super(SqliteProfileTest, self).setUp()
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.flags(connection="sqlite:///" + os.path.join(path, "db.sqlite"),
+                   group="database")
+        self.flags(sqlite_concurrent=True)
+        self.addCleanup(sqlite_profile.CONF.clear_override, "connection",
+                        "database")
+        self.addCleanup(sqlite_profile.CONF.clear_override,
+                        "sqlite_concurrent")
+        self.addCleanup(sqlite_profile.cleanup)
+        self.stubs.Set(sqlite_profile, "RETRY_DELAY", 0)
+
+    def test_is_enabled(self):
+        self.assertTrue(sqlite_profile.is_enabled())
+        self.flags(connection="sqlite://", group="database")
+        self.assertFalse(sqlite_profile.is_enabled())
+
+    def test_sessions(self):
+        writer = sqlite_profile.get_session()
+        self.assertEqual("wal",
+                         writer.execute("PRAGMA journal_mode").scalar())
+        writer.execute("CREATE TABLE t (id INTEGER)")
+        writer.execute("INSERT INTO t VALUES (1)")
+
+        reader = sqlite_profile.get_session(read_only=True)
+        self.assertEqual(1, reader.execute("SELECT id FROM t").scalar())
+        self.assertRaises(Exception, reader.execute,
+                          "INSERT INTO t VALUES (2)")
+
+    def test_request_transaction_is_refused(self):
+        db.check_config()
+        self.flags(db_request_transaction=True)
+        self.addCleanup(sqlite_profile.CONF.clear_override,
+                        "db_request_transaction")
+        self.assertRaises(exception.GceapiException, db.check_config)
+
+    def test_retry_if_locked(self):
+        calls = []
+
+        @sqlite_profile.retry_if_locked
+        def write(context):
+            calls.append(context)
+            if len(calls) < 3:
+                raise Exception("database is locked")
+            return "written"
+
+        ctx = context.RequestContext("fake_user", "fake_project")
+        self.assertEqual("written", write(ctx))
+        self.assertEqual(3, len(calls))
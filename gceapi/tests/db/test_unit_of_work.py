@@ -0,0 +1,81 @@
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+
+import webob
+
+from gceapi.api import operation_api
+from gceapi.api import operation_util
+from gceapi.api import operations
+from gceapi.api import scopes
+from gceapi import context
+from gceapi import db
+from gceapi.db import migration
+from gceapi.openstack.common.db.sqlalchemy import session as db_session
+from gceapi import test
+
+
+class UnitOfWorkTest(test.TestCase):
+
+    def setUp(self):
+        super(UnitOfWorkTest, self).setUp()
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.flags(connection="sqlite:///" + os.path.join(path, "db.sqlite"),
+                   group="database")
+        self.flags(db_request_transaction=True)
+        self.addCleanup(db.CONF.clear_override, "connection", "database")
+        self.addCleanup(db.CONF.clear_override, "db_request_transaction")
+        self.addCleanup(db_session.cleanup)
+        db_session.cleanup()
+        migration.db_sync()
+
+        self.context = context.RequestContext("fake_user", "fake_project")
+        self.resource = operations.create_resource()
+        self.request = webob.Request.blank("/")
+
+    def _insert_disk(self, req):
+        operation_util.init_operation(self.context, "insert", "disk",
+                                      "fake-disk", scopes.GlobalScope())
+        operation_util.start_operation(self.context)
+        db.add_item(self.context, "disk", {"id": "fake-disk"})
+
+    def test_operation_is_saved_in_transaction_of_request(self):
+        self.resource._dispatch(self.context, self._insert_disk,
+                                self.request, {})
+
+        self.assertEqual(["fake-disk"],
+                         [item["id"] for item in
+                          db.get_items(self.context, "disk")])
+        operation = db.get_operation_by_id(self.context,
+                                           self.context.operation["id"])
+        self.assertEqual("DONE", operation["status"])
+        # the saved operation is formatted, not saved once more
+        self.assertIs(self.context.operation,
+                      operation_util.save_operaton(self.context, None))
+        self.assertEqual(1, len(db.get_operations(self.context)))
+
+    def test_item_is_rolled_back_with_operation(self):
+        def fail(*args, **kwargs):
+            raise Exception("operation is not saved")
+
+        self.stubs.Set(operation_api.API, "save_operation", fail)
+        self.assertRaises(Exception, self.resource._dispatch,
+                          self.context, self._insert_disk, self.request, {})
+
+        self.assertEqual([], db.get_items(self.context, "disk"))
+        self.assertFalse(self.context.operation_saved)
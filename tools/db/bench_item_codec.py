@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Micro-benchmark of item payload formats of GCE API database.
+
+Encodes the same operation-like payloads in every supported format and
+measures how fast they are decoded.
+
+Run like:
+
+    ./tools/db/bench_item_codec.py [rows]
+"""
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir, os.pardir)))
+
+from gceapi.db.sqlalchemy import codec
+
+
+def make_payload():
+    item_id = str(uuid.uuid4())
+    return {
+        "insert_time": "2014-01-20T11:17:39.735738Z",
+        "start_time": "2014-01-20T11:17:39.935278Z",
+        "type": "add",
+        "user": "admin",
+        "status": "RUNNING",
+        "progress": 0,
+        "scope_type": "zone",
+        "scope_name": "nova",
+        "target_type": "instance",
+        "target_name": "instance-" + item_id[:8],
+        "method_key": "instance-add",
+        "item_id": item_id,
+    }
+
+
+def bench(name, rows):
+    start = time.time()
+    for row in rows:
+        codec.decode(row)
+    elapsed = time.time() - start
+    size = sum(len(row) for row in rows)
+    print("%-8s %8.3f s %10d rows/s %8d bytes/row" %
+          (name, elapsed, len(rows) / elapsed, size / len(rows)))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payloads = [make_payload() for i in xrange(count)]
+    bench("literal", [str(payload) for payload in payloads])
+    bench("json", [codec.encode(payload, "json") for payload in payloads])
+    bench("zjson", [codec.encode(payload, "zjson") for payload in payloads])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+#    Copyright 2014 Cloudscaling Group, Inc
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Benchmark of GCE API database on SQLite under concurrent clients.
+
+Clients are green threads, as in the API service. Each client lists items
+of a project and sometimes writes an operation. The benchmark runs with
+default SQLite settings and with sqlite_concurrent profile.
+
+Run like:
+
+    ./tools/db/bench_sqlite_concurrency.py [clients] [seconds] [items]
+"""
+import eventlet
+eventlet.monkey_patch(os=False)
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir, os.pardir)))
+
+from oslo.config import cfg
+
+from gceapi import context as gce_context
+from gceapi.db.sqlalchemy import api as db_api
+from gceapi.db.sqlalchemy import migration
+from gceapi.db.sqlalchemy import sqlite_profile
+from gceapi.openstack.common.db.sqlalchemy import session as db_session
+
+CONF = cfg.CONF
+
+# Every WRITE_RATE-th request of a client writes
+WRITE_RATE = 10
+
+
+def prepare(path, items):
+    CONF.set_override("connection", "sqlite:///" + path, group="database")
+    migration.db_sync(0)
+    context = gce_context.RequestContext("bench", "bench")
+    db_api.add_items(context, "instance",
+                     [{"id": str(uuid.uuid4()),
+                       "name": "instance-%d" % i,
+                       "description": "benchmark instance"}
+                      for i in xrange(items)])
+
+
+def client(deadline, stats):
+    context = gce_context.RequestContext("bench", "bench")
+    request = 0
+    while time.time() < deadline:
+        request += 1
+        try:
+            if request % WRITE_RATE:
+                db_api.get_items(context, "instance")
+                stats["lists"] += 1
+            else:
+                operation_id = str(uuid.uuid4())
+                db_api.add_operation(context, {
+                    "id": operation_id,
+                    "name": "operation-" + operation_id,
+                    "insert_time": "2014-01-20T11:17:39.735738Z",
+                    "status": "DONE",
+                    "scope_type": "global",
+                })
+                stats["writes"] += 1
+        except Exception:
+            stats["errors"] += 1
+
+
+def bench(name, clients, seconds):
+    stats = {"lists": 0, "writes": 0, "errors": 0}
+    deadline = time.time() + seconds
+    pool = eventlet.GreenPool(clients)
+    for i in xrange(clients):
+        pool.spawn(client, deadline, stats)
+    pool.waitall()
+    print("%-10s %8.1f lists/s %8.1f writes/s %6d errors" %
+          (name, stats["lists"] / float(seconds),
+           stats["writes"] / float(seconds), stats["errors"]))
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    items = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    CONF([], project="gceapi")
+    for name, concurrent in (("default", False), ("concurrent", True)):
+        handle, path = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        try:
+            CONF.set_override("sqlite_concurrent", concurrent)
+            prepare(path, items)
+            bench(name, clients, seconds)
+        finally:
+            sqlite_profile.cleanup()
+            db_session.cleanup()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()